@@ -0,0 +1,119 @@
+import os
+import time
+
+ERROR_WINDOW = 3600.0
+MAX_KINDS = 10
+SAMPLE_LENGTH = 200
+OTHER = 'прочие'
+
+
+def clock_time(timestamp):
+    """Время суток для сообщения."""
+    return time.strftime('%H:%M:%S', time.localtime(timestamp))
+
+
+class ErrorGroup:
+    """Сбои одного типа: число, первый и последний раз, последний текст."""
+
+    def __init__(self, now, sample):
+        self.count = 0
+        self.first = now
+        self.last = now
+        self.sample = sample
+
+    def add(self, now, sample):
+        """Учёт ещё одного сбоя."""
+        self.count += 1
+        self.last = now
+        self.sample = sample
+
+    def describe(self, kind):
+        """Строка сводки."""
+        line = (f'{kind} × {self.count}, '
+                f'{clock_time(self.first)}–{clock_time(self.last)}')
+        return f'{line}: {self.sample}' if self.sample else line
+
+
+class Incident:
+    """Непрерывная полоса сбоев одного арендатора."""
+
+    def __init__(self, now):
+        self.started = now
+        self.notified = now
+        self.total = 0
+        self.groups = {}
+
+    def add(self, now, kind, sample, capacity):
+        """Учёт сбоя; типы сверх `capacity` копятся в общей группе."""
+        self.total += 1
+        if kind not in self.groups and len(self.groups) >= capacity:
+            kind, sample = OTHER, ''
+        group = self.groups.get(kind)
+        if group is None:
+            group = self.groups[kind] = ErrorGroup(now, sample)
+        group.add(now, sample)
+
+
+class ErrorAggregator:
+    """Сводки сбоев по арендаторам вместо сообщения на каждую ошибку.
+
+    Первый сбой сообщается сразу, дальнейшие группируются по типу
+    исключения и уходят одной сводкой не чаще раза в `window` секунд:
+    число, время первого и последнего сбоя, текст последнего. После
+    первого успешного опроса отправляется одно сообщение о
+    восстановлении. На арендатора хранится не больше `capacity` групп с
+    одним усечённым текстом в каждой, сколько бы разных ошибок ни было.
+    `clock` — часы с методом `time()`, как модуль `time`.
+    """
+
+    def __init__(self, window=ERROR_WINDOW, capacity=MAX_KINDS, clock=time):
+        self.window = window
+        self.capacity = capacity
+        self.clock = clock
+        self.incidents = {}
+
+    @classmethod
+    def from_env(cls, clock=time):
+        """Сводки с окном из переменной `ERROR_WINDOW`."""
+        return cls(float(os.getenv('ERROR_WINDOW', ERROR_WINDOW)),
+                   clock=clock)
+
+    def failed(self, tenant, error):
+        """Учёт сбоя; текст для отправки или `None`."""
+        now = self.clock.time()
+        sample = str(error)[:SAMPLE_LENGTH]
+        incident = self.incidents.get(tenant)
+        if incident is None:
+            self.incidents[tenant] = Incident(now)
+            return f'Сбой в работе программы: {sample}'
+        incident.add(now, type(error).__name__, sample, self.capacity)
+        if now - incident.notified < self.window:
+            return None
+        return self.digest(incident, now)
+
+    def digest(self, incident, now):
+        """Сводка накопленных сбоев; группы после неё обнуляются."""
+        lines = [
+            group.describe(kind) for kind, group in sorted(
+                incident.groups.items(), key=lambda item: -item[1].count
+            )
+        ]
+        total = sum(group.count for group in incident.groups.values())
+        incident.groups.clear()
+        incident.notified = now
+        minutes = round(self.window / 60)
+        return '\n'.join(
+            [f'Сбои за последние {minutes} мин (всего {total}):'] + lines
+        )
+
+    def recovered(self, tenant):
+        """Конец полосы сбоев; текст сообщения о восстановлении или `None`."""
+        incident = self.incidents.pop(tenant, None)
+        if incident is None:
+            return None
+        return (f'Работа восстановлена. Сбоев с '
+                f'{clock_time(incident.started)}: {incident.total + 1}')
+
+    def forget(self, tenant):
+        """Сброс сбоев удалённого арендатора без сообщения."""
+        self.incidents.pop(tenant, None)
@@ -0,0 +1,149 @@
+import argparse
+import functools
+import logging
+import sys
+import time
+from collections import Counter
+
+import homework
+from storage import open_state_store, tenant_key
+from streaming import stream_response
+from tracker import HomeworkTracker
+from transport import Transport
+
+BATCH = 500
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+logger = logging.getLogger('homework.backfill')
+
+
+def progress_key(tenant):
+    """Ключ, под которым хранится прогресс загрузки истории арендатора."""
+    return tenant + ':backfill'
+
+
+def to_date(timestamp):
+    """Строка в формате `date_updated` для сравнения с датами работ."""
+    return time.strftime(DATE_FORMAT, time.gmtime(timestamp))
+
+
+def fetch(headers, start, http):
+    """Потоковый запрос истории начиная с `start`."""
+    return homework.request_api(
+        headers, start, http=http, decode=stream_response, stream=True
+    )
+
+
+class Backfill:
+    """Загрузка истории работ одним запросом с сохранением прогресса.
+
+    Записи идут потоком от сокета до хранилища: в памяти держится кусок
+    ответа, одна работа и не больше `batch` ещё не сохранённых статусов.
+    Статусы сохраняются и при обрыве, поэтому повторный запуск не
+    повторяет уже отправленных уведомлений. После полного прохода в
+    хранилище записывается его конец, и следующий запуск начинается с него.
+    """
+
+    def __init__(self, token, store, http, notify=None, summary=False,
+                 batch=BATCH):
+        self.headers = homework.make_headers(token)
+        self.tenant = tenant_key(token)
+        self.store = store
+        self.http = http
+        self.notify = notify
+        self.summary = summary
+        self.batch = batch
+        self.cursor, index = store.load(self.tenant)
+        self.tracker = HomeworkTracker(homework.parse_record, index)
+        self.statuses = Counter()
+
+    def flush(self):
+        """Сохранение накопленных статусов; курсор опроса не сдвигается."""
+        self.store.save(self.tenant, self.cursor, self.tracker.take_updates())
+
+    def load(self, start, end):
+        """Обработка работ, обновлённых в `[start, end)`, и работ без даты.
+
+        У API нет верхней границы выборки, а порядок работ в ответе не
+        гарантирован, поэтому история запрашивается один раз, а более
+        свежие работы отбрасываются по ходу потока. В итог попадают
+        только работы, чей статус оказался новым для индекса.
+        """
+        low, high = to_date(start), to_date(end)
+        pending = 0
+        try:
+            for record in fetch(self.headers, start, self.http):
+                date = record.date_updated
+                if date is not None and not low <= date < high:
+                    continue
+                for message in self.tracker.changes((record,)):
+                    self.statuses[record.status] += 1
+                    if self.notify and not self.summary:
+                        self.notify(message)
+                    pending += 1
+                if pending >= self.batch:
+                    self.flush()
+                    pending = 0
+        finally:
+            self.flush()
+
+    def run(self, start, until, restart=False):
+        """Загрузка истории с `start` или с сохранённого прогресса."""
+        # Без курсора опрос после загрузки продолжится с её конца.
+        self.cursor = self.cursor or until
+        done, _ = self.store.load(progress_key(self.tenant))
+        if done is not None and not restart:
+            start = max(start, done)
+        if start < until:
+            self.load(start, until)
+            self.store.save(progress_key(self.tenant), until, {})
+            logger.info('История до %s загружена', to_date(until))
+        if self.notify and self.summary:
+            self.notify(self.summary_message())
+        return self.statuses
+
+    def summary_message(self):
+        """Одно сообщение-итог вместо сообщения о каждой работе."""
+        details = ', '.join(
+            f'{status}: {count}'
+            for status, count in sorted(self.statuses.items(), key=str)
+        )
+        total = sum(self.statuses.values())
+        return f'Загружена история работ: {total} ({details or "пусто"})'
+
+
+def main(argv=None):
+    """Загрузка истории работ для `PRACTICUM_TOKEN`."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--from-date', type=int, default=0)
+    parser.add_argument('--until', type=int, default=None)
+    parser.add_argument('--summary', action='store_true',
+                        help='одно итоговое сообщение вместо уведомлений')
+    parser.add_argument('--silent', action='store_true',
+                        help='без сообщений в Telegram')
+    parser.add_argument('--restart', action='store_true',
+                        help='не продолжать с сохранённого прогресса')
+    args = parser.parse_args(argv)
+    homework.init()
+    if not homework.PRACTICUM_TOKEN:
+        logger.critical('Проверьте переменные окружения')
+        sys.exit(1)
+    notify = None
+    if not args.silent:
+        import telegram
+
+        homework.check_tokens()
+        bot = telegram.Bot(token=homework.TELEGRAM_TOKEN)
+        notify = functools.partial(homework.send_message, bot)
+
+    store = open_state_store(homework.STATE_DB)
+    until = args.until or int(time.time())
+    with Transport() as http:
+        Backfill(
+            homework.PRACTICUM_TOKEN, store, http, notify, args.summary
+        ).run(args.from_date, until, args.restart)
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
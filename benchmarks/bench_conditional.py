@@ -0,0 +1,62 @@
+import argparse
+import time
+
+from benchmarks.stubs import start_practicum_stub
+from homework import check_response, make_headers, parse_record, request_api
+from streaming import to_record
+from tracker import HomeworkTracker
+from transport import NOT_MODIFIED, Transport
+
+MODES = {
+    'plain': {'conditional': False, 'compress': False, 'etags': False},
+    'compressed': {'conditional': False, 'compress': True, 'etags': False},
+    'digest': {'conditional': True, 'compress': True, 'etags': False},
+    'etag': {'conditional': True, 'compress': True, 'etags': True},
+}
+
+
+def run(mode, args):
+    """Байты на проводе и процессорное время на один опрос."""
+    settings = MODES[mode]
+    server, url = start_practicum_stub(
+        homeworks=args.homeworks, change_rate=args.change_rate, seed=1,
+        compress=settings['compress'], etags=settings['etags']
+    )
+    trackers = [HomeworkTracker(parse_record) for _ in range(args.tenants)]
+    headers = [make_headers(f'token{i}') for i in range(args.tenants)]
+    skipped = 0
+    with Transport(conditional=settings['conditional']) as http:
+        started = time.thread_time()
+        for _ in range(args.polls):
+            for tracker, tenant_headers in zip(trackers, headers):
+                response = request_api(tenant_headers, 0, url, http)
+                if response is NOT_MODIFIED:
+                    skipped += 1
+                    continue
+                check_response(response)
+                records = map(to_record, response['homeworks'])
+                for _ in tracker.changes(records):
+                    pass
+                if settings['conditional']:
+                    http.commit(tenant_headers)
+        cpu = time.thread_time() - started
+    server.shutdown()
+    polls = args.polls * args.tenants
+    print(f'{mode:>10}: {server.bytes_sent / polls:.0f} B/poll '
+          f'cpu={cpu / polls * 1e6:.0f} us/poll skipped={skipped / polls:.0%}')
+
+
+def main():
+    """Сравнение обычных, сжатых и условных запросов к API."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=20)
+    parser.add_argument('--polls', type=int, default=20)
+    parser.add_argument('--homeworks', type=int, default=50)
+    parser.add_argument('--change-rate', type=float, default=0.05)
+    args = parser.parse_args()
+    for mode in MODES:
+        run(mode, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import asyncio
+import time
+
+from benchmarks.stubs import start_practicum_stub
+from engine import PollingEngine
+from scheduling import PollPolicy
+from tenants import Tenant
+
+
+class CountingBot:
+    """Бот, который только считает отправленные сообщения."""
+
+    def __init__(self):
+        self.sent = 0
+
+    def send_message(self, chat_id, text):
+        """Учёт сообщения без обращения к Telegram."""
+        self.sent += 1
+
+
+def main():
+    """Замер пропускной способности движка опроса."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--cycles', type=int, default=1)
+    args = parser.parse_args()
+
+    server, url = start_practicum_stub(homeworks=1)
+    tenants = [Tenant(f'token{i}', str(i)) for i in range(args.tenants)]
+    bot = CountingBot()
+    engine = PollingEngine(
+        bot, tenants, policy=PollPolicy(0, reviewing=0, idle=0, jitter=0),
+        concurrency=args.concurrency, endpoint=url, tick=0.01
+    )
+    started = time.perf_counter()
+    asyncio.run(engine.run(cycles=args.cycles))
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+    polls = args.tenants * args.cycles
+    print(f'tenants={args.tenants} polls={polls} sent={bot.sent} '
+          f'elapsed={elapsed:.2f}s rate={polls / elapsed:.0f} tenants/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPLICA = '''
+import time
+from leases import hold_lease
+from lifecycle import Shutdown
+
+with hold_lease('tenant'), Shutdown():
+    print(time.time(), flush=True)
+    while True:
+        time.sleep(60)
+'''
+
+
+def start_replica(path, ttl):
+    """Копия бота, печатающая время получения аренды."""
+    env = dict(os.environ, LEASE_DB=path, LEASE_TTL=str(ttl))
+    return subprocess.Popen(
+        [sys.executable, '-c', REPLICA], stdout=subprocess.PIPE, text=True,
+        env=env, cwd=os.path.dirname(os.path.dirname(__file__))
+    )
+
+
+def failover(path, ttl, signum):
+    """Секунды от остановки владельца до захвата аренды резервной копией."""
+    primary = start_replica(path, ttl)
+    primary.stdout.readline()
+    standby = start_replica(path, ttl)
+    # Резервная копия успевает увидеть чужую аренду и начать ожидание.
+    time.sleep(ttl / 2)
+    stopped = time.time()
+    primary.send_signal(signum)
+    primary.wait()
+    acquired = float(standby.stdout.readline())
+    standby.kill()
+    standby.wait()
+    return acquired - stopped
+
+
+def main():
+    """Время перехода опроса к резервной копии при падении владельца."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ttl', type=float, nargs='+', default=[1.0, 3.0])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+    modes = {'kill': signal.SIGKILL, 'term': signal.SIGTERM}
+    with tempfile.TemporaryDirectory() as directory:
+        for ttl in args.ttl:
+            for mode, signum in modes.items():
+                times = [
+                    failover(os.path.join(directory, f'{mode}{ttl}-{run}.db'),
+                             ttl, signum)
+                    for run in range(args.runs)
+                ]
+                print(f'ttl={ttl:.1f} s stop={mode} '
+                      f'median={statistics.median(times):.2f} s '
+                      f'max={max(times):.2f} s '
+                      f'bound={ttl + ttl / 3:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
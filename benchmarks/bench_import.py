@@ -0,0 +1,49 @@
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+def import_times(module):
+    """Разбор вывода `python -X importtime`: модуль -> (своё, всего), мкс."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, total, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own), int(total))
+    return times
+
+
+def main():
+    """Время холодного импорта модуля по данным `-X importtime`."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--module', default='homework')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='ошибка, если медиана импорта выше бюджета')
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    totals = [times[args.module][1] for times in runs]
+    median = statistics.median(totals) / 1000
+    last = runs[-1]
+    print(f'module={args.module} runs={args.runs} '
+          f'median={median:.1f} ms min={min(totals) / 1000:.1f} ms '
+          f'modules={len(last)}')
+    heaviest = sorted(last.items(), key=lambda item: -item[1][0])
+    for name, (own, total) in heaviest[:args.top]:
+        print(f'  {name:32} self={own / 1000:6.1f} ms '
+              f'total={total / 1000:6.1f} ms')
+    if args.budget_ms is not None and median > args.budget_ms:
+        sys.exit(f'Импорт {args.module}: {median:.1f} мс '
+                 f'> бюджета {args.budget_ms} мс')
+
+
+if __name__ == '__main__':
+    main()
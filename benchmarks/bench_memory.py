@@ -0,0 +1,111 @@
+import argparse
+import gc
+import json
+import tracemalloc
+
+import homework
+from engine import PollingEngine
+from scheduling import PollPolicy
+from storage import StateStore
+from streaming import parse_response
+from tenants import Tenant
+
+STATUSES = ('reviewing', 'approved', 'rejected')
+
+
+class NullStore(StateStore):
+    """Хранилище без состояния: в замер входит только память опроса."""
+
+    def load(self, tenant):
+        """Пустое состояние."""
+        return None, {}
+
+    def save(self, tenant, cursor, updates):
+        """Состояние не сохраняется."""
+
+
+class Body:
+    """Ответ API с телом в байтах, как у `requests.Response`."""
+
+    def __init__(self, content):
+        self.content = content
+
+
+def response_body(tenant, homeworks):
+    """Ответ API арендатора: свой список работ с полями, как у Практикума."""
+    return json.dumps({'homeworks': [
+        {
+            'id': tenant * 100 + index,
+            'homework_name': f'user{tenant}__hw{index}.zip',
+            'status': STATUSES[(tenant + index) % len(STATUSES)],
+            'date_updated': f'2022-01-{index % 28 + 1:02}T12:00:00Z',
+            'lesson_name': 'Итоговый проект',
+            'reviewer_comment': 'Всё нравится',
+        }
+        for index in range(homeworks)
+    ], 'current_date': 1581604970}).encode()
+
+
+def dict_based(tenants, homeworks):
+    """Прежний подход: ответ API и текст сообщения хранятся как есть."""
+    states = []
+    for tenant in range(tenants):
+        response = json.loads(response_body(tenant, homeworks))
+        last = response['homeworks'][-1] if homeworks else None
+        states.append({
+            'token': f'token{tenant}',
+            'chat_id': str(tenant),
+            'timestamp': response['current_date'],
+            'homeworks': response['homeworks'],
+            'last_message': last and homework.parse_status(last),
+        })
+    return states
+
+
+def compact(tenants, homeworks):
+    """Состояния движка: индекс статусов по компактным записям."""
+    polling = PollingEngine(
+        None, [Tenant(f'token{tenant}', str(tenant))
+               for tenant in range(tenants)],
+        policy=PollPolicy(600), store=NullStore()
+    )
+    for tenant, state in enumerate(polling.states.values()):
+        response = parse_response(Body(response_body(tenant, homeworks)))
+        for _ in state.tracker.changes(response.records):
+            pass
+        state.tracker.take_updates()
+        state.timestamp = response.current_date
+    return polling
+
+
+def measure(build, tenants, homeworks):
+    """Байты, удерживаемые построенным состоянием."""
+    gc.collect()
+    tracemalloc.start()
+    result = build(tenants, homeworks)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    """Память на арендатора и на отслеживаемую работу."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=100000)
+    parser.add_argument('--homeworks', type=int, default=3)
+    args = parser.parse_args()
+    homework.logger.disabled = True
+    for name, build in (('dict', dict_based), ('compact', compact)):
+        empty = measure(build, args.tenants, 0)
+        full = measure(build, args.tenants, args.homeworks)
+        per_homework = (full - empty) / (args.tenants * args.homeworks)
+        print(f'{name:8} tenants={args.tenants} '
+              f'per_tenant={empty / args.tenants:.0f} B '
+              f'per_homework={per_homework:.0f} B '
+              f'total={full / 2 ** 20:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
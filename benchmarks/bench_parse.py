@@ -0,0 +1,85 @@
+import argparse
+import json
+import time
+import tracemalloc
+
+from homework import check_response
+from streaming import (
+    CHUNK_SIZE, HomeworkStream, extract, json_loads, loads
+)
+
+
+def make_body(homeworks):
+    """Тело ответа с полной историей из `homeworks` работ."""
+    return json.dumps({
+        'homeworks': [
+            {
+                'id': index,
+                'homework_name': f'username__hw{index}.zip',
+                'status': 'approved',
+                'date_updated': '2022-01-01T00:00:00Z',
+                'lesson_name': 'Итоговый проект',
+                'reviewer_comment': 'Всё нравится' * 10,
+            }
+            for index in range(homeworks)
+        ],
+        'current_date': 1,
+    }, ensure_ascii=False).encode()
+
+
+def separate(body):
+    """Прежний путь: `json`, `check_response`, затем проход по словарям."""
+    response = json.loads(body)
+    check_response(response)
+    return [
+        (homework.get('id'), homework['status'], homework.get('date_updated'))
+        for homework in response['homeworks']
+    ]
+
+
+def fused(body):
+    """Проверка и извлечение записей за один проход."""
+    return extract(loads(body)).records
+
+
+def streamed(body):
+    """Потоковый разбор кусками по `CHUNK_SIZE`."""
+    chunks = (
+        body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)
+    )
+    return sum(1 for _ in HomeworkStream(chunks))
+
+
+def measure(func, body, repeat):
+    """Среднее время разбора и пик выделенной памяти."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(body)
+    elapsed = (time.perf_counter() - started) / repeat
+    tracemalloc.start()
+    func(body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    """Сравнение разбора ответа API: раздельный, слитный и потоковый."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--homeworks', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    body = make_body(args.homeworks)
+    print(f'body={len(body) / 1024:.0f} KiB '
+          f'decoder={json_loads().__module__}')
+    for name, func in (
+        ('separate', separate), ('fused', fused), ('streamed', streamed)
+    ):
+        elapsed, peak = measure(func, body, args.repeat)
+        print(f'{name:9} time={elapsed * 1e3:.2f} ms '
+              f'peak={peak / 1024:.0f} KiB')
+
+
+if __name__ == '__main__':
+    main()
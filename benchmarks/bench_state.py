@@ -0,0 +1,32 @@
+import argparse
+import os
+import tempfile
+import time
+
+from storage import SQLiteStateStore, tenant_key
+
+
+def main():
+    """Замер накладных расходов на сохранение состояния после опроса."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--polls', type=int, default=5000)
+    parser.add_argument('--tenants', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteStateStore(os.path.join(directory, 'state.sqlite3'))
+        keys = [tenant_key(f'token{i}') for i in range(args.tenants)]
+        started = time.perf_counter()
+        for poll in range(args.polls):
+            store.save(
+                keys[poll % args.tenants], poll,
+                {poll % 7: ('reviewing', f'2022-01-01T00:00:{poll % 60}Z')}
+            )
+        elapsed = time.perf_counter() - started
+        store.close()
+    print(f'polls={args.polls} '
+          f'write={elapsed / args.polls * 1e6:.1f} us/poll')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import argparse
+import time
+
+import requests
+
+from benchmarks.stubs import start_practicum_stub
+from homework import make_headers, request_api
+from transport import Transport
+
+
+def measure(server, url, http, requests_count):
+    """Средняя задержка запроса и число открытых соединений."""
+    server.connections = 0
+    headers = make_headers('token')
+    started = time.perf_counter()
+    for _ in range(requests_count):
+        request_api(headers, 0, url, http)
+    elapsed = time.perf_counter() - started
+    return elapsed / requests_count * 1000, server.connections
+
+
+def main():
+    """Сравнение `requests.get` и пула соединений `Transport`."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    server, url = start_practicum_stub(homeworks=1)
+    with Transport() as transport:
+        paths = (('requests.get', requests), ('Transport', transport))
+        for name, http in paths:
+            latency, connections = measure(server, url, http, args.requests)
+            print(f'{name:>12}: {latency:.3f} ms/request, '
+                  f'{connections} connections')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import heapq
+import random
+import time
+
+from scheduling import TimingWheel
+
+
+def bench_wheel(delays, ticks):
+    """Стоимость планирования, отмены и тика колеса таймеров."""
+    wheel = TimingWheel()
+    started = time.perf_counter()
+    for key, delay in enumerate(delays):
+        wheel.schedule(key, delay)
+    scheduled = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for key in range(0, len(delays), 10):
+        wheel.cancel(key)
+    cancelled = time.perf_counter() - started
+
+    fired, worst = 0, 0.0
+    started = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        tick_started = time.perf_counter()
+        due = wheel.advance(tick)
+        for key in due:
+            wheel.schedule(key, delays[key])
+        fired += len(due)
+        worst = max(worst, time.perf_counter() - tick_started)
+    advanced = time.perf_counter() - started
+    return scheduled, cancelled, advanced, worst, fired
+
+
+def bench_heap(delays, ticks):
+    """Та же нагрузка на куче сроков (без отмены)."""
+    heap = [(delay, key) for key, delay in enumerate(delays)]
+    started = time.perf_counter()
+    heapq.heapify(heap)
+    fired = 0
+    for tick in range(1, ticks + 1):
+        while heap and heap[0][0] <= tick:
+            _, key = heapq.heappop(heap)
+            heapq.heappush(heap, (tick + delays[key], key))
+            fired += 1
+    return time.perf_counter() - started, fired
+
+
+def main():
+    """Замер колеса таймеров на 100k+ арендаторах."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=200000)
+    parser.add_argument('--ticks', type=int, default=3600)
+    args = parser.parse_args()
+
+    rand = random.Random(1)
+    delays = [rand.uniform(60, 1800) for _ in range(args.tenants)]
+    scheduled, cancelled, advanced, worst, fired = bench_wheel(
+        delays, args.ticks
+    )
+    print(f'wheel: schedule={scheduled / args.tenants * 1e9:.0f} ns/op '
+          f'cancel={cancelled / (args.tenants / 10) * 1e9:.0f} ns/op '
+          f'tick={advanced / args.ticks * 1e6:.0f} us/tick '
+          f'(worst {worst * 1e3:.1f} ms) fired={fired} '
+          f'per-fire={advanced / max(fired, 1) * 1e9:.0f} ns')
+    heap_time, heap_fired = bench_heap(delays, args.ticks)
+    print(f' heap: tick={heap_time / args.ticks * 1e6:.0f} us/tick '
+          f'fired={heap_fired} '
+          f'per-fire={heap_time / max(heap_fired, 1) * 1e9:.0f} ns')
+
+
+if __name__ == '__main__':
+    main()
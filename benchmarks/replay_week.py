@@ -0,0 +1,82 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import homework
+from cassettes import Cassette, replay
+
+STATUSES = ('reviewing', 'rejected', 'reviewing', 'approved')
+
+
+def synthetic_cassette(days, period, homeworks, seed=0):
+    """Кассета с опросами раз в `period` секунд за `days` дней.
+
+    Статусы работ иногда меняются; среди ответов есть 500 и серия 401,
+    часть отправок в Telegram завершается ошибкой сети.
+    """
+    rand = random.Random(seed)
+    start = 1_700_000_000
+    cassette = Cassette(start)
+    progress = [0] * homeworks
+    from_date = start
+    polls = days * 24 * 60 * 60 // period
+    for poll in range(polls):
+        t = poll * period
+        roll = rand.random()
+        if roll < 0.01:
+            cassette.add_api(t, from_date, 500, {'code': 'server_error'})
+            continue
+        if polls // 2 <= poll < polls // 2 + 3:
+            cassette.add_api(t, from_date, 401, {'code': 'not_authenticated'})
+            continue
+        changed = [
+            index for index in range(homeworks)
+            if progress[index] < len(STATUSES) - 1 and rand.random() < 0.01
+        ]
+        for index in changed:
+            progress[index] += 1
+            error = 'NetworkError' if rand.random() < 0.05 else None
+            cassette.add_send(t, '0', error, error and 'Network is down')
+        cassette.add_api(t, from_date, 200, {
+            'homeworks': [
+                {'id': index, 'homework_name': f'hw{index}',
+                 'status': STATUSES[progress[index]],
+                 'date_updated': f'{progress[index]}'}
+                for index in range(homeworks)
+            ],
+            'current_date': start + t,
+        })
+        from_date = start + t
+    return cassette
+
+
+def main():
+    """Прогон недели опросов бота по кассете на виртуальных часах."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--period', type=int, default=homework.RETRY_PERIOD)
+    parser.add_argument('--homeworks', type=int, default=20)
+    args = parser.parse_args()
+
+    homework.logger.setLevel('CRITICAL')
+    cassette = synthetic_cassette(args.days, args.period, args.homeworks)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'week.jsonl.gz')
+        cassette.save(path)
+        size = os.path.getsize(path)
+        cassette = Cassette.load(path)
+    started = time.perf_counter()
+    replayer, clock = replay(cassette, homework)
+    elapsed = time.perf_counter() - started
+    print(f'cassette={size / 1024:.1f} KiB polls={replayer.polls} '
+          f'sent={replayer.sent} send_errors={replayer.failed} '
+          f'diverged={replayer.diverged} late={replayer.late} '
+          f'lag={replayer.lag / 60:.1f} min')
+    print(f'virtual={clock.slept / 3600:.1f} h real={elapsed:.2f} s '
+          f'speedup={clock.slept / elapsed:,.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import resource
+import statistics
+import time
+
+import telegram
+
+from benchmarks.stubs import start_practicum_stub, start_telegram_stub
+from engine import PollingEngine
+from scheduling import PollPolicy
+from tenants import Tenant
+
+
+class TimedEngine(PollingEngine):
+    """Движок, который запоминает длительность каждого опроса."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+
+    async def poll(self, state):
+        """Опрос с замером длительности."""
+        started = time.perf_counter()
+        await super().poll(state)
+        self.latencies.append(time.perf_counter() - started)
+
+
+def parse_errors(spec):
+    """Разбор доли ошибок вида `500=0.01,401=0.001`."""
+    errors = {}
+    for item in filter(None, spec.split(',')):
+        code, _, rate = item.partition('=')
+        errors[int(code)] = float(rate)
+    return errors
+
+
+def main():
+    """Нагрузочный прогон движка против заглушек Практикума и Telegram."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--homeworks', type=int, default=5)
+    parser.add_argument('--change-rate', type=float, default=0.3)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--api-latency', type=float, default=0.0)
+    parser.add_argument('--api-errors', type=parse_errors, default={})
+    parser.add_argument('--telegram-latency', type=float, default=0.0)
+    parser.add_argument('--telegram-errors', type=parse_errors, default={})
+    args = parser.parse_args()
+
+    api, api_url = start_practicum_stub(
+        homeworks=args.homeworks, change_rate=args.change_rate,
+        latency=args.api_latency, errors=args.api_errors, seed=1
+    )
+    tg, tg_url = start_telegram_stub(
+        latency=args.telegram_latency, errors=args.telegram_errors, seed=2
+    )
+    bot = telegram.Bot(token='123:stub', base_url=tg_url)
+    tenants = [Tenant(f'token{i}', str(i)) for i in range(args.tenants)]
+    engine = TimedEngine(
+        bot, tenants, policy=PollPolicy(0, reviewing=0, idle=0, jitter=0),
+        concurrency=args.concurrency, endpoint=api_url, tick=0.01
+    )
+    started = time.perf_counter()
+    asyncio.run(engine.run(cycles=args.cycles))
+    elapsed = time.perf_counter() - started
+    api.shutdown()
+    tg.shutdown()
+
+    latencies = sorted(engine.latencies)
+    quantiles = statistics.quantiles(latencies, n=100)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'polls={len(latencies)} ({len(latencies) / elapsed:.0f}/s) '
+          f'messages={tg.messages} ({tg.messages / elapsed:.0f}/s) '
+          f'api_requests={api.requests} '
+          f'p50={quantiles[49] * 1e3:.1f}ms p99={quantiles[98] * 1e3:.1f}ms '
+          f'peak_rss={peak_rss:.0f}MiB elapsed={elapsed:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+import homework
+from breaker import CircuitBreaker
+from cassettes import ReplayResponse
+from clock import VirtualClock
+from engine import PollingEngine
+from outbox import Outbox
+from scheduling import PollPolicy
+from tenants import Tenant
+
+STATUSES = ('reviewing', 'rejected', 'reviewing', 'approved')
+DAY = 24 * 60 * 60
+
+
+class SimulatedAPI:
+    """API Практикума на виртуальных часах: у каждого токена свои работы.
+
+    За опрос статус одной из работ продвигается с вероятностью
+    `change_rate`, доля ответов `error_rate` — ошибка 500.
+    """
+
+    def __init__(self, clock, homeworks=3, change_rate=0.02,
+                 error_rate=0.001, seed=0):
+        self.clock = clock
+        self.homeworks = homeworks
+        self.change_rate = change_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.progress = {}
+        self.calls = 0
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        """Ответ на опрос токена из заголовка `Authorization`."""
+        self.calls += 1
+        if self.random.random() < self.error_rate:
+            return ReplayResponse(500, {'code': 'server_error'})
+        token = headers['Authorization']
+        progress = self.progress.setdefault(token, [0] * self.homeworks)
+        if self.random.random() < self.change_rate:
+            index = self.random.randrange(self.homeworks)
+            if progress[index] < len(STATUSES) - 1:
+                progress[index] += 1
+        return ReplayResponse(200, {
+            'homeworks': [
+                {'id': index, 'homework_name': f'hw{index}',
+                 'status': STATUSES[step], 'date_updated': str(step)}
+                for index, step in enumerate(progress)
+            ],
+            'current_date': int(self.clock.time()),
+        })
+
+
+class CountingBot:
+    """Бот, который только считает отправленные сообщения."""
+
+    def __init__(self):
+        self.sent = 0
+
+    def send_message(self, chat_id, text):
+        """Учёт сообщения без обращения к Telegram."""
+        self.sent += 1
+
+
+def simulate(tenants, days, seed=0, tick=1.0):
+    """Прогон движка опроса по виртуальным часам; итоговые счётчики."""
+    random.seed(seed)
+    clock = VirtualClock(start=1_700_000_000)
+    api = SimulatedAPI(clock, seed=seed)
+    bot = CountingBot()
+    outbox = Outbox(clock=clock.time)
+    engine = PollingEngine(
+        bot, [Tenant(f'token{i}', str(i)) for i in range(tenants)],
+        policy=PollPolicy(homework.RETRY_PERIOD), outbox=outbox, tick=tick,
+        clock=clock, http=api, breaker=CircuitBreaker(clock=clock.monotonic)
+    )
+    asyncio.run(engine.run(duration=days * DAY))
+    return api.calls, bot.sent, len(outbox)
+
+
+def main():
+    """Детерминированная симуляция множества арендаторов за несколько дней."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--days', type=float, default=1)
+    parser.add_argument('--tick', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger('homework').setLevel(logging.CRITICAL)
+    started, cpu = time.perf_counter(), time.process_time()
+    calls, sent, queued = simulate(args.tenants, args.days, args.seed,
+                                   args.tick)
+    cpu = time.process_time() - cpu
+    elapsed = time.perf_counter() - started
+    print(f'tenants={args.tenants} days={args.days:g} api_calls={calls} '
+          f'sent={sent} queued={queued}')
+    print(f'cpu={cpu:.2f} s wall={elapsed:.2f} s '
+          f'cpu_per_call={cpu / max(calls, 1) * 1e6:.0f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import random
+import statistics
+
+from exceptions import StatusCodeError
+from homework import RETRY_PERIOD
+from scheduling import PollPolicy, PollSchedule
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def student_events(rand, days):
+    """Моменты смены статуса работ одного студента: (время, статус)."""
+    events = []
+    time = rand.uniform(0, DAY)
+    while time < days * DAY:
+        review = time + rand.uniform(HOUR, DAY)
+        verdict = review + rand.uniform(10 * 60, 3 * HOUR)
+        events.append((review, 'reviewing'))
+        events.append((verdict, rand.choice(('approved', 'rejected'))))
+        time = verdict + rand.uniform(DAY, 4 * DAY)
+    return events
+
+
+def simulate(policy, days, students, error_rate, seed):
+    """Число запросов к API и задержки уведомлений для политики."""
+    rand = random.Random(seed)
+    calls, latencies = 0, []
+    for _ in range(students):
+        events = student_events(rand, days)
+        schedule = PollSchedule(policy, rand=rand.random)
+        now, position, status = 0.0, 0, None
+        while now < days * DAY:
+            calls += 1
+            if rand.random() < error_rate:
+                schedule.failed(StatusCodeError('500'))
+            else:
+                changed = False
+                while position < len(events) and events[position][0] <= now:
+                    latencies.append(now - events[position][0])
+                    status = events[position][1]
+                    position += 1
+                    changed = True
+                schedule.succeeded(changed, status == 'reviewing')
+            now += schedule.delay()
+    return calls, latencies
+
+
+def main():
+    """Сравнение фиксированной и адаптивной политики опроса."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--students', type=int, default=200)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    policies = {
+        'fixed': PollPolicy(
+            RETRY_PERIOD, reviewing=RETRY_PERIOD, idle=RETRY_PERIOD,
+            max_backoff=RETRY_PERIOD, jitter=0
+        ),
+        'adaptive': PollPolicy.from_env(RETRY_PERIOD),
+    }
+    baseline = None
+    for name, policy in policies.items():
+        calls, latencies = simulate(
+            policy, args.days, args.students, args.error_rate, args.seed
+        )
+        baseline = baseline or calls
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f'{name:>8}: calls={calls} '
+              f'saved={1 - calls / baseline:.1%} '
+              f'latency mean={statistics.mean(latencies):.0f}s '
+              f'p95={p95:.0f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+STATUSES = ('reviewing', 'approved', 'rejected')
+ERROR_BODIES = {
+    401: {
+        'code': 'not_authenticated',
+        'message': 'Учетные данные не были предоставлены.',
+        'source': '__response__',
+    },
+    429: {'code': 'throttled', 'message': 'Слишком много запросов.'},
+    500: {'code': 'server_error', 'message': 'Внутренняя ошибка сервера.'},
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Общая часть заглушек: keep-alive, задержка, подсчёт соединений."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        """Учёт открытых клиентами соединений."""
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def send_json(self, status, data, headers=()):
+        """Ответ в формате JSON; сжимается, если клиент принимает gzip."""
+        body = b'' if data is None else json.dumps(data).encode()
+        compress = (
+            body and self.server.compress
+            and 'gzip' in self.headers.get('Accept-Encoding', '')
+        )
+        if compress:
+            body = gzip.compress(body)
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.bytes_sent += len(body)
+        self.send_response(status)
+        if data is not None:
+            self.send_header('Content-Type', 'application/json')
+        if compress:
+            self.send_header('Content-Encoding', 'gzip')
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def inject(self):
+        """Задержка и случайная ошибка; код ошибки или `None`."""
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        roll = self.server.random.random()
+        for status, rate in self.server.errors.items():
+            if roll < rate:
+                return status
+            roll -= rate
+        return None
+
+    def log_message(self, format, *args):
+        """Журнал запросов заглушки не нужен."""
+
+
+class PracticumHandler(StubHandler):
+    """Ответы в формате API статусов домашних работ."""
+
+    def do_GET(self):
+        """Список домашних работ; статусы меняются с `change_rate`.
+
+        Поддерживается `If-None-Match`: `ETag` зависит только от списка.
+        """
+        error = self.inject()
+        if error:
+            self.send_json(error, ERROR_BODIES.get(error, {}))
+            return
+        token = self.headers.get('Authorization', '')
+        server = self.server
+        with server.lock:
+            generation = server.generations.get(token, 0)
+            if server.random.random() < server.change_rate:
+                generation += 1
+                server.generations[token] = generation
+        homeworks = [
+            {
+                'id': index,
+                'homework_name': f'hw{index}',
+                'status': STATUSES[(index + generation) % len(STATUSES)],
+                'date_updated': f'2022-01-01T00:00:{generation % 60:02}Z',
+                'lesson_name': 'Итоговый проект',
+                'reviewer_comment': 'Всё нравится',
+            }
+            for index in range(server.homeworks)
+        ]
+        etag = '"{}"'.format(hashlib.md5(
+            json.dumps(homeworks).encode()
+        ).hexdigest())
+        headers = (('ETag', etag),) if server.etags else ()
+        if server.etags and self.headers.get('If-None-Match') == etag:
+            self.send_json(304, None, headers)
+            return
+        self.send_json(200, {
+            'homeworks': homeworks, 'current_date': int(time.time())
+        }, headers)
+
+
+class TelegramHandler(StubHandler):
+    """Метод `sendMessage` Bot API; остальные методы не нужны боту."""
+
+    def do_POST(self):
+        """Приём сообщения или ошибка Bot API."""
+        length = int(self.headers.get('Content-Length', 0))
+        payload = self.rfile.read(length)
+        if not self.path.endswith('/sendMessage'):
+            self.send_json(404, {'ok': False, 'error_code': 404,
+                                 'description': 'Not Found'})
+            return
+        error = self.inject()
+        if error == 429:
+            self.send_json(429, {
+                'ok': False, 'error_code': 429,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1},
+            })
+            return
+        if error:
+            self.send_json(error, {'ok': False, 'error_code': error,
+                                   'description': 'Stub error'})
+            return
+        if self.headers.get('Content-Type', '').startswith('application/json'):
+            data = json.loads(payload or b'{}')
+        else:
+            data = {
+                key: values[0] for key, values in parse_qs(
+                    payload.decode()
+                ).items()
+            }
+        with self.server.lock:
+            self.server.messages += 1
+            message_id = self.server.messages
+        chat_id = int(data.get('chat_id', 0))
+        self.send_json(200, {'ok': True, 'result': {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': data.get('text', ''),
+        }})
+
+
+def start_stub(handler, latency=0.0, errors=None, seed=None, **settings):
+    """Запуск заглушки в фоновом потоке; возвращает сервер и адрес.
+
+    `errors` — доли ответов с ошибкой по кодам, например `{500: 0.01}`.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.errors = errors or {}
+    server.random = random.Random(seed)
+    server.lock = threading.Lock()
+    server.connections = server.requests = server.bytes_sent = 0
+    server.messages = 0
+    server.generations = {}
+    server.compress = server.etags = False
+    for name, value in settings.items():
+        setattr(server, name, value)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/'
+
+
+def start_practicum_stub(homeworks=0, change_rate=1.0, **settings):
+    """Заглушка API Практикума с `homeworks` работами в ответе."""
+    return start_stub(
+        PracticumHandler, homeworks=homeworks, change_rate=change_rate,
+        **settings
+    )
+
+
+def start_telegram_stub(**settings):
+    """Заглушка Telegram Bot API; адрес подходит для `Bot(base_url=...)`."""
+    server, url = start_stub(TelegramHandler, **settings)
+    return server, url + 'bot'
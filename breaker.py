@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+from exceptions import CircuitOpenError
+
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 60
+HALF_OPEN_PROBES = 1
+
+
+class CircuitBreaker:
+    """Предохранитель для обращений к API Практикума.
+
+    `closed` — запросы идут как обычно; после `failure_threshold` сбоев
+    подряд — `open`: запросы сразу отклоняются `CircuitOpenError`. Через
+    `reset_timeout` секунд — `half-open`: пропускается не больше
+    `half_open_probes` пробных запросов; успех закрывает цепь, сбой
+    снова размыкает её.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD,
+                 reset_timeout=RESET_TIMEOUT,
+                 half_open_probes=HALF_OPEN_PROBES, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+
+    @classmethod
+    def from_env(cls):
+        """Предохранитель с настройками из переменных `BREAKER_*`."""
+        return cls(
+            failure_threshold=int(
+                os.getenv('BREAKER_FAILURES', FAILURE_THRESHOLD)
+            ),
+            reset_timeout=float(
+                os.getenv('BREAKER_RESET_TIMEOUT', RESET_TIMEOUT)
+            ),
+            half_open_probes=int(
+                os.getenv('BREAKER_PROBES', HALF_OPEN_PROBES)
+            ),
+        )
+
+    def before_call(self):
+        """Разрешение на запрос; при разомкнутой цепи — исключение."""
+        with self.lock:
+            if self.state == self.OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(
+                        'API Практикума недоступно, запросы приостановлены'
+                    )
+                self.state = self.HALF_OPEN
+                self.probes = 0
+            if self.state == self.HALF_OPEN:
+                if self.probes >= self.half_open_probes:
+                    raise CircuitOpenError(
+                        'API Практикума недоступно, идёт пробный запрос'
+                    )
+                self.probes += 1
+
+    def record_success(self):
+        """Успешный ответ замыкает цепь."""
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Сбой; при превышении порога или в `half-open` цепь размыкается."""
+        with self.lock:
+            self.failures += 1
+            if (
+                self.state == self.HALF_OPEN
+                or self.failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = self.clock()
@@ -0,0 +1,345 @@
+import argparse
+import gzip
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from breaker import CircuitBreaker
+from clock import VirtualClock
+from exceptions import CassetteExhausted
+
+API = 'api'
+SEND = 'send'
+META = 'meta'
+
+logger = logging.getLogger('homework.cassettes')
+
+
+def open_cassette(path, mode='r'):
+    """Файл кассеты; при расширении `.gz` — сжатый gzip."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class Cassette:
+    """Запись обменов бота с API Практикума и Telegram в JSON Lines.
+
+    Событие API: `k='api'`, `t` — секунда от начала записи, `f` —
+    `from_date`, `s` — код ответа. У тела вида `homeworks` и
+    `current_date` хранится `cd`, а список работ `hw` — только если он
+    изменился с прошлого ответа; другое тело пишется целиком в `b`, ошибка
+    запроса — в `e`. Событие Telegram: `k='send'`, ошибка — имя класса в
+    `e` и текст в `m`; тексты сообщений не сохраняются.
+    """
+
+    def __init__(self, start=None, events=None):
+        self.start = time.time() if start is None else start
+        self.events = list(events or ())
+        self._homeworks = None
+
+    def add_api(self, t, from_date, status=None, body=None, error=None):
+        """Ответ API или ошибка запроса."""
+        event = {'k': API, 't': round(t, 3), 'f': from_date}
+        if error is not None:
+            event['e'] = error
+        else:
+            event['s'] = status
+            if isinstance(body, dict) and set(body) == {
+                'homeworks', 'current_date'
+            }:
+                event['cd'] = body['current_date']
+                if body['homeworks'] != self._homeworks:
+                    event['hw'] = self._homeworks = body['homeworks']
+            else:
+                event['b'] = body
+        self.events.append(event)
+
+    def add_send(self, t, chat_id, error=None, message=None):
+        """Результат отправки сообщения в Telegram."""
+        event = {'k': SEND, 't': round(t, 3), 'c': chat_id}
+        if error is not None:
+            event['e'] = error
+            event['m'] = message
+        self.events.append(event)
+
+    def api_events(self):
+        """События API с восстановленными телами ответов."""
+        homeworks = None
+        for event in self.events:
+            if event['k'] != API:
+                continue
+            body = event.get('b')
+            if 'cd' in event:
+                homeworks = event.get('hw', homeworks)
+                body = {'homeworks': homeworks, 'current_date': event['cd']}
+            yield {
+                't': event['t'], 'from_date': event['f'],
+                'status': event.get('s'),
+                'body': body, 'error': event.get('e'),
+            }
+
+    def send_events(self):
+        """События отправки в Telegram."""
+        return (event for event in self.events if event['k'] == SEND)
+
+    def save(self, path):
+        """Запись кассеты в файл."""
+        with open_cassette(path, 'w') as file:
+            file.write(json.dumps({'k': META, 'start': self.start}) + '\n')
+            for event in self.events:
+                file.write(
+                    json.dumps(event, ensure_ascii=False,
+                               separators=(',', ':')) + '\n'
+                )
+
+    @classmethod
+    def load(cls, path):
+        """Чтение кассеты из файла."""
+        with open_cassette(path) as file:
+            events = [json.loads(line) for line in file if line.strip()]
+        start = None
+        if events and events[0]['k'] == META:
+            start = events.pop(0)['start']
+        return cls(start, events)
+
+
+class Recorder:
+    """Обёртка над `requests` и ботом, пишущая обмены в кассету."""
+
+    def __init__(self, cassette, http, clock=time):
+        self.cassette = cassette
+        self.http = http
+        self.clock = clock
+
+    def elapsed(self):
+        """Секунды от начала записи."""
+        return self.clock.time() - self.cassette.start
+
+    def get(self, url, params=None, **kwargs):
+        """GET-запрос с записью ответа или ошибки."""
+        from_date = (params or {}).get('from_date')
+        try:
+            response = self.http.get(url, params=params, **kwargs)
+        except Exception as error:
+            self.cassette.add_api(self.elapsed(), from_date, error=str(error))
+            raise
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        self.cassette.add_api(
+            self.elapsed(), from_date, response.status_code, body
+        )
+        return response
+
+
+class RecordingBot:
+    """Бот, результаты отправки которого пишутся в кассету."""
+
+    def __init__(self, recorder, bot):
+        self.recorder = recorder
+        self.bot = bot
+
+    def send_message(self, chat_id, text, **kwargs):
+        """Отправка сообщения с записью результата."""
+        import telegram
+
+        try:
+            result = self.bot.send_message(chat_id, text, **kwargs)
+        except telegram.error.TelegramError as error:
+            self.recorder.cassette.add_send(
+                self.recorder.elapsed(), chat_id, type(error).__name__,
+                str(error)
+            )
+            raise
+        self.recorder.cassette.add_send(self.recorder.elapsed(), chat_id)
+        return result
+
+
+class ReplayResponse:
+    """Ответ API, восстановленный из кассеты."""
+
+    reason = ''
+
+    def __init__(self, status, body):
+        self.status_code = status
+        self.body = body
+
+    def json(self):
+        """Тело ответа."""
+        if self.body is None:
+            raise ValueError('Ответ без тела JSON')
+        return self.body
+
+    @property
+    def content(self):
+        """Тело ответа в байтах."""
+        return json.dumps(self.body).encode()
+
+
+def telegram_error(name, message):
+    """Исключение Telegram по имени класса из кассеты."""
+    import telegram
+
+    error = getattr(telegram.error, name, telegram.error.TelegramError)
+    try:
+        return error(message)
+    except TypeError:
+        return telegram.error.TelegramError(message)
+
+
+class Replayer:
+    """Подмена `requests` и бота ответами из кассеты.
+
+    Ответы API выдаются по порядку, по их концу поднимается
+    `CassetteExhausted`. Отправки без записи в кассете считаются
+    успешными. `diverged` — число запросов, чей `from_date` не совпал с
+    записанным: бот повёл себя иначе, чем при записи.
+
+    С часами `clock` запрос, сделанный раньше записанного `t`, ждёт его:
+    время воспроизведения идёт как при записи. Запрос позже `t` больше
+    чем на `tolerance` секунд считается в `late`, а наибольшее опоздание —
+    в `lag`: бот опрашивал реже, чем при записи.
+    """
+
+    def __init__(self, cassette, clock=None, tolerance=1.0):
+        self.api = cassette.api_events()
+        self.sends = cassette.send_events()
+        self.start = cassette.start
+        self.clock = clock
+        self.tolerance = tolerance
+        self.polls = self.sent = self.failed = self.diverged = 0
+        self.late = 0
+        self.lag = 0.0
+
+    def _wait(self, t):
+        """Сдвиг часов к записанному времени запроса."""
+        delay = self.start + t - self.clock.time()
+        if delay > 0:
+            self.clock.sleep(delay)
+        elif -delay > self.tolerance:
+            self.late += 1
+            self.lag = max(self.lag, -delay)
+
+    def get(self, url, params=None, **kwargs):
+        """Следующий ответ API из кассеты."""
+        import requests
+
+        event = next(self.api, None)
+        if event is None:
+            raise CassetteExhausted('Кассета закончилась')
+        if self.clock is not None:
+            self._wait(event['t'])
+        self.polls += 1
+        if (params or {}).get('from_date') != event['from_date']:
+            self.diverged += 1
+        if event['error'] is not None:
+            raise requests.RequestException(event['error'])
+        return ReplayResponse(event['status'], event['body'])
+
+    def send_message(self, chat_id, text, **kwargs):
+        """Результат отправки из кассеты."""
+        self.sent += 1
+        event = next(self.sends, None)
+        if event is not None and 'e' in event:
+            self.failed += 1
+            raise telegram_error(event['e'], event['m'])
+
+
+@contextmanager
+def patched(target, **attributes):
+    """Временная подмена атрибутов объекта."""
+    saved = {name: getattr(target, name) for name in attributes}
+    for name, value in attributes.items():
+        setattr(target, name, value)
+    try:
+        yield target
+    finally:
+        for name, value in saved.items():
+            setattr(target, name, value)
+
+
+@contextmanager
+def recording(path, module):
+    """Запись обменов `main()` модуля `module` в кассету `path`."""
+    import requests
+    import telegram
+
+    cassette = Cassette()
+    recorder = Recorder(cassette, requests)
+    bot = telegram.Bot
+
+    def get_api_answer(timestamp):
+        return module.request_api(module.HEADERS, timestamp, http=recorder)
+
+    def make_bot(*args, **kwargs):
+        return RecordingBot(recorder, bot(*args, **kwargs))
+
+    with patched(module, get_api_answer=get_api_answer):
+        with patched(telegram, Bot=make_bot):
+            try:
+                yield cassette
+            finally:
+                cassette.save(path)
+
+
+def replay(cassette, module):
+    """Прогон `main()` модуля `module` по кассете на виртуальных часах.
+
+    Запросы идут по записанным временам событий. Возвращает `Replayer`
+    со счётчиками и часы с пройденным временем.
+    """
+    import telegram
+
+    clock = VirtualClock(cassette.start)
+    replayer = Replayer(cassette, clock)
+    breaker = CircuitBreaker(clock=clock.monotonic)
+
+    def get_api_answer(timestamp):
+        return module.request_api(
+            module.HEADERS, timestamp, http=replayer, breaker=breaker
+        )
+
+    with patched(
+        module, get_api_answer=get_api_answer, time=clock, STATE_DB=None,
+        OUTBOX_DB=None,
+        PRACTICUM_TOKEN=module.PRACTICUM_TOKEN or 'replay',
+        TELEGRAM_TOKEN=module.TELEGRAM_TOKEN or 'replay',
+        TELEGRAM_CHAT_ID=module.TELEGRAM_CHAT_ID or '0',
+    ):
+        with patched(telegram, Bot=lambda *args, **kwargs: replayer):
+            try:
+                module.main()
+            except CassetteExhausted:
+                pass
+    return replayer, clock
+
+
+def main():
+    """Запись работы бота в кассету или воспроизведение кассеты."""
+    import homework
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('mode', choices=('record', 'replay'))
+    parser.add_argument('path', help='файл кассеты, `.gz` — со сжатием')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+    if args.mode == 'record':
+        homework.init()
+        with recording(args.path, homework):
+            homework.main()
+        return
+    homework.logger.setLevel(args.log_level.upper())
+    started = time.perf_counter()
+    replayer, clock = replay(Cassette.load(args.path), homework)
+    print(f'polls={replayer.polls} sent={replayer.sent} '
+          f'send_errors={replayer.failed} diverged={replayer.diverged} '
+          f'late={replayer.late} lag={replayer.lag / 60:.1f} min '
+          f'virtual={clock.slept / 3600:.1f} h '
+          f'real={time.perf_counter() - started:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
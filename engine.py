@@ -0,0 +1,566 @@
+import asyncio
+import functools
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import Executor, Future
+from contextlib import nullcontext
+
+import homework
+from alerts import ErrorAggregator
+from leases import open_leases
+from exceptions import GracefulExit
+from lifecycle import Shutdown
+from metrics import LOOP_LAG, OUTBOX_DEPTH, POLLS_IN_FLIGHT, serve_from_env
+from outbox import GLOBAL_RATE, STOP_TIMEOUT, Outbox
+from scheduling import PollPolicy, PollSchedule, TimingWheel
+from storage import MemoryStateStore, open_state_store, tenant_key
+from streaming import parse_response
+from tenants import (
+    TenantRegistry, check_tenant, group_tenants, load_tenants
+)
+from tracker import HomeworkTracker
+from transport import NOT_MODIFIED, Transport
+
+CONCURRENCY = 64
+TICK = 1.0
+RELOAD_INTERVAL = 5.0
+
+logger = logging.getLogger('homework.engine')
+
+
+class DaemonExecutor(Executor):
+    """Пул потоков-демонов для блокирующих вызовов движка.
+
+    Потоки `ThreadPoolExecutor` процесс дожидается при выходе, и запрос
+    к API, зависший до таймаутов соединения и чтения, держал бы остановку
+    дольше её срока. Потоки этого пула создаются по мере надобности, не
+    больше `size`, и выход процесса не задерживают.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.tasks = queue.SimpleQueue()
+        self.threads = []
+        self.idle = threading.Semaphore(0)
+        self.closed = False
+
+    def submit(self, func, *args, **kwargs):
+        """Вызов `func` в потоке пула; `concurrent.futures.Future`."""
+        if self.closed:
+            raise RuntimeError('Пул потоков остановлен')
+        future = Future()
+        self.tasks.put((future, func, args, kwargs))
+        if (
+            not self.idle.acquire(blocking=False)
+            and len(self.threads) < self.size
+        ):
+            thread = threading.Thread(
+                target=self._work, name=f'engine-{len(self.threads)}',
+                daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+        return future
+
+    def _work(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            future, func, args, kwargs = task
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except BaseException as error:
+                    future.set_exception(error)
+            del task, future
+            self.idle.release()
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        """Остановка пула; `wait=False` не ждёт идущих вызовов."""
+        self.closed = True
+        while cancel_futures:
+            try:
+                task = self.tasks.get_nowait()
+            except queue.Empty:
+                break
+            task[0].cancel()
+        for _ in self.threads:
+            self.tasks.put(None)
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+
+class TenantState:
+    """Состояние опроса одного токена и его подписчиков.
+
+    Состояний столько же, сколько токенов, поэтому у них, как и у
+    трекера и расписания, нет `__dict__`.
+    """
+
+    __slots__ = (
+        'subscription', 'key', 'timestamp', 'tracker',
+        'schedule', 'cycles', 'active',
+    )
+
+    def __init__(self, subscription, store, policy, timestamp):
+        self.subscription = subscription
+        self.key = tenant_key(subscription.token)
+        cursor, index = store.load(self.key)
+        self.timestamp = cursor or timestamp
+        self.tracker = HomeworkTracker(homework.parse_record, index)
+        self.schedule = PollSchedule(policy)
+        self.cycles = None
+        self.active = True
+
+    @property
+    def headers(self):
+        """Заголовки запроса; собираются при опросе, а не хранятся."""
+        return homework.make_headers(self.subscription.token)
+
+    def reload(self, store):
+        """Чтение курсора и статусов, сохранённых другой копией бота."""
+        cursor, index = store.load(self.key)
+        self.timestamp = cursor or self.timestamp
+        self.tracker = HomeworkTracker(homework.parse_record, index)
+
+    def rotate(self, subscription):
+        """Замена токена; курсор и статусы уже сохранены под новым ключом."""
+        self.subscription = subscription
+        self.key = tenant_key(subscription.token)
+
+
+class PollingEngine:
+    """Опрос API для множества арендаторов в одном цикле событий.
+
+    Арендаторы с одним токеном объединяются в подписку: API опрашивается
+    один раз на токен, а сообщение рассылается во все чаты подписки.
+
+    С часами `clock` (например, `clock.VirtualClock`) цикл идёт по их
+    времени и детерминированно: вызовы выполняются без пула потоков,
+    опросы тика идут по очереди, очередь сообщений доставляется в том
+    же цикле. `http` и `breaker` заменяют пул
+    соединений и общий предохранитель.
+
+    С реестром `registry` (`tenants.TenantRegistry`) его файлы
+    проверяются раз в `RELOAD_INTERVAL` секунд, а изменения применяются
+    к идущему опросу через `update`.
+
+    С арендами `leases` (`leases.SQLiteLeases`) арендатора опрашивает
+    только копия бота, удерживающая его аренду; остальные копии держат
+    его в колесе и продлевают попытки захвата. Получив аренду, копия
+    перечитывает состояние из общего хранилища и опрашивает арендатора
+    в пределах окна джиттера.
+
+    С `shutdown` (`lifecycle.Shutdown`) весь цикл идёт в его критической
+    секции: после сигнала (он замечается на ближайшем тике) новые опросы
+    не начинаются, а идущие дожидаются не дольше срока остановки.
+    Не успевшие опросы
+    отменяются, процесс выходит с кодом 1, не дожидаясь их потоков.
+    """
+
+    def __init__(self, bot, tenants, policy=None, concurrency=CONCURRENCY,
+                 endpoint=homework.ENDPOINT, store=None, outbox=None,
+                 tick=TICK, clock=None, http=None, breaker=None,
+                 registry=None, leases=None, shutdown=None):
+        self.bot = bot
+        self.tick = tick
+        self.outbox = outbox
+        self.clock = clock
+        self.http = http
+        self.registry = registry
+        self.leases = leases
+        self.shutdown = shutdown
+        self.owned = set()
+        self._reload_at = self._renew_at = 0.0
+        self._renewed = None
+        self.breaker = homework.BREAKER if breaker is None else breaker
+        self.errors = ErrorAggregator.from_env(clock or time)
+        if policy is None:
+            policy = PollPolicy.from_env(homework.RETRY_PERIOD)
+        self.policy = policy
+        self.concurrency = concurrency
+        self.endpoint = endpoint
+        self.store = MemoryStateStore() if store is None else store
+        self.states = {}
+        self.cycles = None
+        self.wheel = None
+        self.update(tenants)
+        self._executor = None
+        self._semaphore = None
+        self._http = None
+
+    async def _call(self, func, *args):
+        """Выполнение блокирующего вызова в пуле потоков."""
+        if self.clock is not None:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def send(self, state, message):
+        """Рассылка сообщения во все чаты подписки (через очередь, если есть).
+
+        Без очереди отправка во все чаты идёт одновременно.
+        """
+        chat_ids = state.subscription.chat_ids
+        if self.outbox is not None:
+            for chat_id in chat_ids:
+                await self._call(self.outbox.put, chat_id, message)
+            return
+        await asyncio.gather(*(
+            self._call(homework.send_to_chat, self.bot, chat_id, message)
+            for chat_id in chat_ids
+        ))
+
+    async def process(self, state, response):
+        """Рассылка изменений и сохранение состояния; были ли изменения."""
+        updated = False
+        for message in state.tracker.changes(response.records):
+            await self.send(state, message)
+            updated = True
+        state.timestamp = response.current_date or state.timestamp
+        self.store.save(
+            state.key, state.timestamp, state.tracker.take_updates()
+        )
+        # Подменённый `http` (заглушки, кассеты) может не хранить ETag.
+        commit = getattr(self._http, 'commit', None)
+        if commit is not None:
+            commit(state.headers)
+        return updated
+
+    async def poll(self, state):
+        """Один цикл опроса: запрос, проверка ответа и уведомление."""
+        async with self._semaphore:
+            try:
+                response = await self._call(functools.partial(
+                    homework.request_api, state.headers, state.timestamp,
+                    self.endpoint, self._http, breaker=self.breaker,
+                    decode=parse_response
+                ))
+                with self._critical():
+                    updated = False
+                    if response is not NOT_MODIFIED:
+                        updated = await self.process(state, response)
+                    # Опрос удался, когда изменения разосланы и сохранены.
+                    notice = self.errors.recovered(state)
+                    if notice:
+                        await self.send(state, notice)
+                if not updated:
+                    logger.debug('Нет обновлений')
+                state.schedule.succeeded(updated, state.tracker.in_review())
+            except Exception as error:
+                message = f'Сбой в работе программы: {error}'
+                logger.error(message)
+                state.schedule.failed(error)
+                notice = self.errors.failed(state, error)
+                if notice:
+                    await self.send(state, notice)
+
+    def _critical(self):
+        if self.shutdown is None:
+            return nullcontext()
+        return self.shutdown.critical()
+
+    def _add(self, state):
+        state.cycles = self.cycles
+        self.states[state.subscription.token] = state
+        if self.wheel is not None:
+            self.wheel.schedule(state, 0)
+
+    def _remove(self, state):
+        state.active = False
+        self.errors.forget(state)
+        del self.states[state.subscription.token]
+        if self.wheel is not None and state in self.wheel:
+            self.wheel.cancel(state)
+
+    def update(self, tenants):
+        """Применение нового списка арендаторов к идущему опросу.
+
+        Некорректные записи пропускаются с ошибкой в журнале. Новые токены
+        встают в колесо на ближайший тик, удалённые снимаются с него, у
+        остальных обновляется набор чатов. Токен, чьи чаты целиком перешли
+        к новому токену, считается заменённым: курсор и статусы работ
+        сохраняются. Колесо и хранилище затрагиваются только для
+        изменившихся подписок. Возвращает числа добавленных, удалённых и
+        заменённых токенов.
+        """
+        return self._apply(self._plan(tenants))
+
+    def _plan(self, tenants):
+        """Блокирующая часть `update`: сверка списков и работа с хранилищем.
+
+        Состояния новых токенов читаются, состояния заменённых
+        записываются под новым ключом; движок при этом не меняется.
+        """
+        subscriptions = {
+            subscription.token: subscription
+            for subscription in group_tenants(filter(check_tenant, tenants))
+        }
+        removed = [
+            state for token, state in self.states.items()
+            if token not in subscriptions
+        ]
+        retired = {state.subscription.chat_ids: state for state in removed}
+        timestamp = int((self.clock or time).time())
+        added, rotated = {}, {}
+        for token, subscription in subscriptions.items():
+            if token in self.states:
+                continue
+            state = retired.pop(subscription.chat_ids, None)
+            if state is None:
+                added[token] = TenantState(
+                    subscription, self.store, self.policy, timestamp
+                )
+                continue
+            self.store.save(
+                tenant_key(token), state.timestamp, dict(state.tracker.index)
+            )
+            rotated[token] = state
+        return subscriptions, added, removed, rotated
+
+    def _apply(self, plan):
+        """Применение результата `_plan` к состояниям и колесу."""
+        subscriptions, added, removed, rotated = plan
+        for token, subscription in subscriptions.items():
+            state = self.states.get(token)
+            if state is not None:
+                state.subscription = subscription
+            elif token in added:
+                self._add(added[token])
+            else:
+                state = rotated[token]
+                del self.states[state.subscription.token]
+                state.rotate(subscription)
+                self.states[token] = state
+        for state in removed:
+            if state.subscription.token not in subscriptions:
+                self._remove(state)
+        counts = len(added), len(removed) - len(rotated), len(rotated)
+        if any(counts):
+            logger.info('Арендаторы: добавлено %s, удалено %s, заменено %s',
+                        *counts)
+        return counts
+
+    async def _reload(self):
+        """Проверка реестра; чтение файлов и хранилища идёт вне цикла.
+
+        Нечитаемый файл реестра не останавливает опрос: ошибка пишется
+        в журнал, арендаторы остаются прежними.
+        """
+        try:
+            tenants = await self._call(self.registry.changed)
+        except (OSError, ValueError) as error:
+            logger.error('Не удалось перечитать арендаторов: %s', error)
+            return
+        if tenants is not None:
+            self._apply(await self._call(self._plan, tenants))
+
+    async def _renew(self, now):
+        """Продление аренд и захват освободившихся.
+
+        Ошибка базы аренд не останавливает опрос: продление повторится
+        через интервал, а если аренды не продлевались дольше их срока,
+        копия перестаёт считать их своими. Арендатор, полученный от
+        другой копии, опрашивается в пределах окна джиттера, а не всем
+        скопом на ближайшем тике; аренды первого продления уже разнесены
+        по колесу при запуске.
+        """
+        states = {state.key: state for state in self.states.values()}
+        try:
+            held = await self._call(self.leases.acquire, states)
+        except sqlite3.Error as error:
+            logger.error('Не удалось продлить аренды: %s', error)
+            if self._renewed is not None and (
+                now - self._renewed >= self.leases.ttl
+            ):
+                logger.warning('Аренды истекли, опрос приостановлен')
+                self.owned = set()
+            return
+        if self._renewed is None:
+            self._renewed, self.owned = now, held
+            return
+        self._renewed = now
+        spread = self.policy.period * self.policy.jitter
+        for key in held - self.owned:
+            state = states[key]
+            await self._call(state.reload, self.store)
+            self.wheel.schedule(state, spread * state.schedule.rand())
+        lost = len(self.owned - held)
+        if lost:
+            logger.warning('Аренды %s арендаторов перешли к другой копии',
+                           lost)
+        self.owned = held
+
+    async def _maintain(self, now):
+        """Проверка реестра и продление аренд по их расписанию."""
+        if self.registry is not None and now >= self._reload_at:
+            self._reload_at = now + RELOAD_INTERVAL
+            await self._reload()
+        if self.leases is not None and now >= self._renew_at:
+            self._renew_at = now + self.leases.interval
+            await self._renew(now)
+
+    async def _cycle(self, state):
+        """Опрос арендатора и планирование следующего срока в колесе."""
+        if self.leases is None or state.key in self.owned:
+            await self.poll(state)
+        if not state.active:
+            return
+        if state.cycles is not None:
+            state.cycles -= 1
+            if not state.cycles:
+                return
+        self.wheel.schedule(state, state.schedule.delay())
+
+    def _now(self):
+        if self.clock is None:
+            return asyncio.get_running_loop().time()
+        return self.clock.monotonic()
+
+    async def _pause(self):
+        """Пауза на тик; на виртуальных часах — сдвиг времени."""
+        if self.clock is None:
+            await asyncio.sleep(self.tick)
+            return
+        if self.outbox is not None:
+            self.outbox.deliver(self.bot)
+        self.clock.sleep(self.tick)
+
+    async def _loop(self, deadline):
+        """Тики колеса до его опустошения или до `deadline`."""
+        loop = asyncio.get_running_loop()
+        running = set()
+        now = self._now()
+        watching = self.registry is not None
+        while (
+            (self.wheel or running or watching)
+            and (deadline is None or now < deadline)
+            and not self._stopping()
+        ):
+            await self._maintain(now)
+            for state in self.wheel.advance(now):
+                if self.clock is not None:
+                    # Вызовы синхронны: опросы тика идут по очереди.
+                    await self._cycle(state)
+                    continue
+                task = loop.create_task(self._cycle(state))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            POLLS_IN_FLIGHT.set(len(running))
+            expected = now + self.tick
+            await self._pause()
+            now = self._now()
+            LOOP_LAG.set(max(0.0, now - expected))
+        if running:
+            await self._drain(running)
+
+    def _stopping(self):
+        return self.shutdown is not None and self.shutdown.requested
+
+    async def _drain(self, running):
+        """Ожидание идущих опросов; после сигнала — не дольше срока."""
+        timeout = self.shutdown.take_deadline() if self._stopping() else None
+        _, pending = await asyncio.wait(set(running), timeout=timeout)
+        if not pending:
+            return
+        logger.error('Опросов, не завершённых за срок остановки: %s',
+                     len(pending))
+        for task in pending:
+            task.cancel()
+        await asyncio.wait(pending)
+        raise GracefulExit(1)
+
+    async def run(self, cycles=None, duration=None):
+        """Запуск опроса всех арендаторов; `cycles=None` — бесконечно.
+
+        Сроки опроса хранятся в колесе таймеров; на каждом тике арендаторы
+        с наступившим сроком пачкой уходят на опрос. `duration` — предел
+        работы в секундах по часам цикла.
+        """
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        now = self._now()
+        self.wheel = TimingWheel(self.tick, now=now)
+        # Первые опросы разносятся по окну джиттера, а не идут залпом.
+        spread = self.policy.period * self.policy.jitter
+        self.cycles = cycles
+        for index, state in enumerate(self.states.values()):
+            state.cycles = cycles
+            self.wheel.schedule(state, spread * index / len(self.states))
+        if self.http is None:
+            http = Transport(pool_maxsize=self.concurrency, conditional=True)
+        else:
+            http = nullcontext(self.http)
+        with http as self._http:
+            self._executor = DaemonExecutor(self.concurrency)
+            try:
+                with self._critical():
+                    await self._loop(
+                        None if duration is None else now + duration
+                    )
+            finally:
+                if self.leases is not None:
+                    self.leases.release(self.owned)
+                    self.owned = set()
+                self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(tenants, outbox_path=None, rate=GLOBAL_RATE, registry=None):
+    """Опрос арендаторов с доставкой сообщений через очередь `outbox_path`.
+
+    `rate` — общий предел сообщений в секунду для этого процесса,
+    `registry` — реестр арендаторов, изменения которого применяются на ходу.
+    По SIGTERM и SIGINT начатые отправки и записи состояния завершаются,
+    аренды возвращаются, а доставка очереди останавливается;
+    недоставленное остаётся в файле очереди.
+    """
+    import telegram
+
+    bot = telegram.Bot(token=homework.TELEGRAM_TOKEN)
+    store = open_state_store(homework.STATE_DB)
+    outbox = Outbox(outbox_path, rate=rate)
+    thread = outbox.start(bot)
+    OUTBOX_DEPTH.set_function(outbox.__len__)
+    # Срок остановки отсчитывает сам цикл: SIGALRM прервал бы его где угодно.
+    shutdown = Shutdown.from_env(alarm=False)
+    polling = PollingEngine(
+        bot, tenants, store=store, outbox=outbox, registry=registry,
+        leases=open_leases(os.getenv('LEASE_DB')), shutdown=shutdown
+    )
+    try:
+        with shutdown:
+            asyncio.run(polling.run())
+    finally:
+        outbox.stop()
+        thread.join(STOP_TIMEOUT)
+
+
+def read_registry(accept=None):
+    """Реестр из файла или каталога `TENANTS_FILE`; без него — `None`."""
+    path = os.getenv('TENANTS_FILE')
+    return TenantRegistry(path, accept) if path else None
+
+
+def main():
+    """Запуск опроса для арендаторов из `TENANTS_FILE` или `TENANTS`."""
+    homework.init()
+    registry = read_registry()
+    if registry is not None:
+        tenants = registry.load()
+    else:
+        tenants = load_tenants(os.getenv('TENANTS', ''))
+    if not homework.TELEGRAM_TOKEN or not (tenants or registry):
+        logger.critical('Проверьте переменные окружения')
+        sys.exit(1)
+    serve_from_env()
+    serve(tenants, homework.OUTBOX_DB, registry=registry)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,28 @@
 class StatusCodeError(Exception):
     """Исключение, для случаев, когда статус код сервера отличен от 200."""
+
+    pass
+
+
+class EndpointConnectionError(Exception):
+    """Исключение, для случаев, когда эндпоинт недоступен."""
+
+    pass
+
+
+class CircuitOpenError(Exception):
+    """Исключение, для случаев, когда запросы к API приостановлены."""
+
+    pass
+
+
+class GracefulExit(SystemExit):
+    """Исключение, для завершения работы по сигналу остановки."""
+
+    pass
+
+
+class CassetteExhausted(BaseException):
+    """Исключение, для остановки воспроизведения по концу кассеты."""
+
     pass
@@ -3,23 +3,39 @@ import os
 import sys
 import time
 from http import HTTPStatus
-from logging.handlers import RotatingFileHandler
 
-import requests
-import telegram
-from dotenv import load_dotenv
-
-from exceptions import StatusCodeError
-
-load_dotenv()
+from alerts import ErrorAggregator
+from breaker import CircuitBreaker
+from exceptions import EndpointConnectionError, StatusCodeError
+from leases import hold_lease
+from lifecycle import Shutdown
+from metrics import API_RESPONSES, STAGE_ERRORS, serve_from_env, timed
+from outbox import OUTBOX_FILE, delivering
+from scheduling import PollPolicy, PollSchedule
+from statuses import status_code
+from storage import STATE_FILE, open_state_store, tenant_key
+from streaming import to_record
+from tracing import span
+from tracker import HomeworkTracker
+from transport import NOT_MODIFIED, TIMEOUT
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+STATE_DB = os.getenv('STATE_DB', STATE_FILE)
+OUTBOX_DB = os.getenv('OUTBOX_DB', OUTBOX_FILE)
 
 RETRY_PERIOD = 600
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+
+
+def make_headers(token):
+    """Заголовки авторизации для токена Практикума."""
+    return {'Authorization': f'OAuth {token}'}
+
+
+HEADERS = make_headers(PRACTICUM_TOKEN)
+BREAKER = CircuitBreaker.from_env()
 
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
@@ -27,16 +43,41 @@ HOMEWORK_VERDICTS = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.',
 }
 
-formatter = logging.Formatter(
-    '%(asctime)s [%(levelname)s] | '
-    '(%(filename)s).%(funcName)s:%(lineno)d | %(message)s'
-)
-handler = RotatingFileHandler('homework.log', maxBytes=50000000, backupCount=5)
-handler.setFormatter(formatter)
-
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-logger.addHandler(handler)
+log_listener = None
+
+
+def init(log_file=None):
+    """Загрузка `.env` и настройка журнала перед запуском бота.
+
+    Импорт модуля не читает `.env` и не создаёт файлов и обработчиков:
+    всё это делается здесь, один раз при запуске процесса.
+    `log_file` заменяет файл журнала по умолчанию.
+    """
+    global PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, STATE_DB
+    global OUTBOX_DB, BREAKER
+    global HEADERS, log_listener
+    from dotenv import load_dotenv
+
+    import profiler
+    import tracing
+    from logs import LOG_FILE, setup_logging
+
+    load_dotenv()
+    PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
+    TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
+    TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+    STATE_DB = os.getenv('STATE_DB', STATE_FILE)
+    OUTBOX_DB = os.getenv('OUTBOX_DB', OUTBOX_FILE)
+    HEADERS = make_headers(PRACTICUM_TOKEN)
+    BREAKER = CircuitBreaker.from_env()
+    if log_listener is None:
+        log_listener = setup_logging(
+            logger, path=log_file or LOG_FILE,
+            level=os.getenv('LOG_LEVEL', 'DEBUG').upper()
+        )
+        tracing.setup_from_env()
+        profiler.setup_from_env()
 
 
 def check_tokens():
@@ -47,34 +88,89 @@ def check_tokens():
     logger.debug('Переменные окружения успешно загружены')
 
 
-def send_message(bot, message):
-    """Отправка сообщения пользователю."""
+@timed('send_message')
+def send_to_chat(bot, chat_id, message):
+    """Отправка сообщения в указанный чат."""
+    import telegram
+
     try:
         logger.debug('Подготовка к отправке сообщения')
-        bot.send_message(TELEGRAM_CHAT_ID, message)
+        bot.send_message(chat_id, message)
     except telegram.error.TelegramError as error:
+        STAGE_ERRORS.inc('send_message')
         logger.error(error, exc_info=True)
     else:
         logger.debug('Сообщение успешно отправлено!')
 
 
-def get_api_answer(timestamp):
-    """Делаем запрос к эндпоинту API-сервиса."""
+def send_message(bot, message):
+    """Отправка сообщения пользователю.
+
+    `TELEGRAM_CHAT_ID` может содержать несколько чатов через запятую.
+    """
+    for chat_id in str(TELEGRAM_CHAT_ID).split(','):
+        send_to_chat(bot, chat_id.strip(), message)
+
+
+@timed('get_api_answer')
+def request_api(headers, timestamp, endpoint=ENDPOINT, http=None,
+                breaker=None, decode=None, stream=False):
+    """Запрос к API от имени произвольного токена.
+
+    `http` — пул соединений `transport.Transport`, по умолчанию `requests`.
+    `breaker` — предохранитель, по умолчанию общий `BREAKER`: 5xx, 429 и
+    ошибки соединения считаются сбоями API. Если пул соединений определил, что
+    ответ не изменился, возвращается `NOT_MODIFIED` без разбора тела.
+    `decode(response)` заменяет `response.json()`, например разбором из
+    модуля `streaming`; `stream=True` не читает тело ответа заранее.
+    """
+    import requests
+
+    http = requests if http is None else http
+    breaker = BREAKER if breaker is None else breaker
+    breaker.before_call()
     try:
         logger.debug('Делаем запрос к API')
-        response = requests.get(
-            url=ENDPOINT, headers=HEADERS, params={'from_date': timestamp}
-        )
+        with span('http_get'):
+            response = http.get(
+                url=endpoint, headers=headers,
+                params={'from_date': timestamp}, timeout=TIMEOUT,
+                stream=stream
+            )
+        API_RESPONSES.inc(int(response.status_code))
+        if (
+            response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+            or response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        ):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if getattr(response, 'not_modified', False):
+            logger.debug('Ответ API не изменился')
+            return NOT_MODIFIED
         if response.status_code != HTTPStatus.OK:
-            logger.error(f'Ошибка подключения! Код - {response.status_code}')
+            logger.error('Ошибка подключения! Код - %s', response.status_code)
             raise StatusCodeError(f'Статус сервера: {response.status_code}')
-    except requests.RequestException:
+    except requests.RequestException as error:
+        breaker.record_failure()
         logger.error('Ошибка подключения к эндпоинту')
+        raise EndpointConnectionError(
+            f'Ошибка подключения к эндпоинту: {error}'
+        ) from error
     else:
         logger.debug('Ответ от API успешно получен')
-    return response.json()
+    with span('decode'):
+        if decode is not None:
+            return decode(response)
+        return response.json()
+
 
+def get_api_answer(timestamp):
+    """Делаем запрос к эндпоинту API-сервиса."""
+    return request_api(HEADERS, timestamp)
 
+
+@timed('check_response')
 def check_response(response):
     """Проверка API на соответствие документации."""
     if not isinstance(response, dict):
@@ -88,6 +184,7 @@ def check_response(response):
         raise TypeError('response["homeworks"] возвращает не список')
 
 
+@timed('parse_status')
 def parse_status(homework):
     """Извлекает из информации о конкретной домашней работе статус работы."""
     try:
@@ -100,38 +197,80 @@ def parse_status(homework):
     return f'Изменился статус проверки работы "{homework_name}". {verdict}'
 
 
+def parse_record(record):
+    """Извлекает статус работы из компактной записи `streaming`."""
+    return parse_status(
+        {'homework_name': record.name, 'status': status_code(record.status)}
+    )
+
+
 def main():
     """Основная логика работы бота."""
+    import telegram
+
     check_tokens()
+    serve_from_env()
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    last_message = None
-    while True:
-        try:
-            response = get_api_answer(timestamp)
-            check_response(response)
-            if (
-                len(response.get('homeworks')) > 0
-                and parse_status(response.get('homeworks')[0]) != last_message
-            ):
-                message = parse_status(response.get('homeworks')[0])
-                send_message(bot, message)
-                last_message = parse_status(response.get('homeworks')[0])
-            else:
-                logger.debug('Нет обновлений')
-        except telegram.error.TelegramError as e:
-            logger.error(f'При отправлении сообщения возникла ошибка {e}')
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.error(message)
-            if message != last_message:
-                send_message(bot, message)
-                last_message = message
-        finally:
-            timestamp = response.get('current_date')
-            time.sleep(RETRY_PERIOD)
+    store = open_state_store(STATE_DB)
+    tenant = tenant_key(PRACTICUM_TOKEN)
+    # Одна копия из нескольких опрашивает API, остальные ждут аренду.
+    # Сообщения идут через очередь `outbox` с лимитами и повторами.
+    with hold_lease(tenant), Shutdown.from_env() as shutdown, delivering(
+        OUTBOX_DB, bot
+    ) as sender:
+        # Состояние читается после получения аренды: его мог сдвинуть
+        # прежний владелец.
+        timestamp, index = store.load(tenant)
+        timestamp = timestamp or int(time.time())
+        errors = ErrorAggregator.from_env(time)
+        tracker = HomeworkTracker(parse_record, index)
+        # Один арендатор: разносить опросы во времени не с кем.
+        schedule = PollSchedule(PollPolicy.from_env(RETRY_PERIOD, jitter=0))
+        while True:
+            with span('poll_cycle'):
+                try:
+                    response = get_api_answer(timestamp)
+                    check_response(response)
+                    with shutdown.critical():
+                        updated = False
+                        records = map(to_record, response.get('homeworks'))
+                        for message in tracker.changes(records):
+                            send_message(sender, message)
+                            updated = True
+                        if not updated:
+                            logger.debug('Нет обновлений')
+                        timestamp = response.get('current_date', timestamp)
+                        with span('save_state'):
+                            store.save(
+                                tenant, timestamp, tracker.take_updates()
+                            )
+                        # Восстановление — только после сохранения состояния.
+                        notice = errors.recovered(tenant)
+                        if notice:
+                            send_message(sender, notice)
+                    schedule.succeeded(updated, tracker.in_review())
+                except telegram.error.TelegramError as e:
+                    logger.error(
+                        'При отправлении сообщения возникла ошибка %s', e
+                    )
+                except Exception as error:
+                    message = f'Сбой в работе программы: {error}'
+                    logger.error(message)
+                    schedule.failed(error)
+                    notice = errors.failed(tenant, error)
+                    if notice:
+                        with shutdown.critical():
+                            send_message(sender, notice)
+            delay = schedule.delay()
+            time.sleep(delay)
             logger.debug('Таймер закончил работу')
 
 
-if __name__ == '__main__':
+def run():
+    """Точка входа процесса: инициализация и цикл опроса."""
+    init()
     main()
+
+
+if __name__ == '__main__':
+    run()
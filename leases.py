@@ -0,0 +1,173 @@
+import logging
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+LEASE_TTL = 30.0
+
+logger = logging.getLogger('homework.leases')
+
+
+def default_owner():
+    """Имя копии бота: хост и pid процесса."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class SQLiteLeases:
+    """Аренды ключей в общем файле SQLite.
+
+    Ключ принадлежит владельцу до `expires`; продлить аренду может только
+    он, захватить — любой после её истечения. Захват и продление идут одной
+    транзакцией на все ключи. Сроки — по `time.time`, общему для процессов
+    одной машины.
+    """
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS leases ('
+        'key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)'
+    )
+    UPSERT = (
+        'INSERT INTO leases VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE '
+        'SET owner = excluded.owner, expires = excluded.expires '
+        'WHERE leases.owner = excluded.owner OR leases.expires <= ?'
+    )
+
+    def __init__(self, path, owner=None, ttl=LEASE_TTL, clock=time.time):
+        self.owner = owner or default_owner()
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        with self.connection:
+            self.connection.execute(self.SCHEMA)
+
+    @classmethod
+    def from_env(cls, path, **overrides):
+        """Аренды со сроком из `LEASE_TTL` и владельцем из `LEASE_OWNER`."""
+        settings = {
+            'owner': os.getenv('LEASE_OWNER'),
+            'ttl': float(os.getenv('LEASE_TTL', LEASE_TTL)),
+        }
+        settings.update(overrides)
+        return cls(path, **settings)
+
+    @property
+    def interval(self):
+        """Период продления и повторных попыток захвата."""
+        return self.ttl / 3
+
+    def acquire(self, keys):
+        """Захват свободных и продление своих аренд; удерживаемые ключи."""
+        keys = list(keys)
+        now = self.clock()
+        with self.lock, self.connection:
+            self.connection.executemany(self.UPSERT, [
+                (key, self.owner, now + self.ttl, now) for key in keys
+            ])
+            rows = self.connection.execute(
+                'SELECT key FROM leases WHERE owner = ? AND expires > ?',
+                (self.owner, now)
+            ).fetchall()
+        return {key for key, in rows}.intersection(keys)
+
+    def release(self, keys):
+        """Досрочный возврат аренд: резервной копии не нужно ждать срока."""
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'DELETE FROM leases WHERE key = ? AND owner = ?',
+                [(key, self.owner) for key in keys]
+            )
+
+    def close(self):
+        """Закрытие соединения с базой."""
+        self.connection.close()
+
+
+def open_leases(path):
+    """Аренды в файле `path`; без пути — `None`, копия бота одна."""
+    if path:
+        return SQLiteLeases.from_env(path)
+    return None
+
+
+def interrupt():
+    """Остановка процесса через SIGTERM и обработчики `lifecycle`."""
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+class Lease:
+    """Аренда одного ключа, продлеваемая в фоновом потоке.
+
+    При потере аренды (например, база была недоступна дольше срока)
+    вызывается `on_lost`: по умолчанию процесс останавливается, чтобы
+    не слать уведомления наравне с новым владельцем.
+    """
+
+    def __init__(self, leases, key, on_lost=interrupt, sleep=time.sleep):
+        self.leases = leases
+        self.key = key
+        self.on_lost = on_lost
+        self.sleep = sleep
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def wait(self):
+        """Ожидание аренды, пока ключ удерживает другая копия."""
+        waiting = False
+        while not self.leases.acquire((self.key,)):
+            if not waiting:
+                logger.info('Опрос ведёт другая копия бота, ожидаю аренду')
+                waiting = True
+            self.sleep(self.leases.interval)
+        logger.info('Аренда получена владельцем %s', self.leases.owner)
+
+    def _renew(self):
+        while not self.stopped.wait(self.leases.interval):
+            try:
+                held = self.leases.acquire((self.key,))
+            except sqlite3.Error as error:
+                logger.error('Не удалось продлить аренду: %s', error)
+                continue
+            if not held:
+                logger.critical('Аренда потеряна, опрос остановлен')
+                self.on_lost()
+                return
+
+    def start(self):
+        """Запуск продления в фоновом потоке."""
+        self.thread = threading.Thread(
+            target=self._renew, name='lease', daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Остановка продления и возврат аренды."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.leases.release((self.key,))
+
+
+@contextmanager
+def hold_lease(key, path=None):
+    """Блок `with`, выполняемый только владельцем аренды ключа `key`.
+
+    Файл аренд — `path` или `LEASE_DB`; без него блок выполняется сразу.
+    """
+    leases = open_leases(path or os.getenv('LEASE_DB'))
+    if leases is None:
+        yield None
+        return
+    lease = Lease(leases, key)
+    lease.wait()
+    lease.start()
+    try:
+        yield lease
+    finally:
+        lease.stop()
+        leases.close()
@@ -0,0 +1,154 @@
+import logging
+import os
+import signal
+import time
+from contextlib import contextmanager
+
+from exceptions import GracefulExit
+
+DRAIN_DEADLINE = 5.0
+SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+logger = logging.getLogger('homework.lifecycle')
+
+
+class Shutdown:
+    """Корректная остановка процесса по SIGTERM и SIGINT.
+
+    Вне критических секций сигнал сразу поднимает `GracefulExit`, в том
+    числе посреди `time.sleep` или ожидания ответа API. Внутри секции
+    (отправка сообщений и запись состояния) сигнал лишь запоминается:
+    процесс выходит по её завершении, но не позже чем через `deadline`
+    секунд; повторный сигнал завершает процесс сразу. `GracefulExit`
+    наследует `SystemExit` и не перехватывается `except Exception`.
+
+    Обработчики сигналов не пишут в журнал: сигнал может прервать поток
+    посреди записи, и повторный вход в очередь журнала заблокировал бы
+    процесс. Записи копятся в `notes` и пишутся по выходе из секции
+    или блока `with`.
+
+    С `alarm=False` срок не отсчитывается по SIGALRM: секция, которая
+    сама следит за `requested`, укладывается в него через
+    `take_deadline`, и выход не случается в произвольном месте.
+    """
+
+    def __init__(self, deadline=DRAIN_DEADLINE, alarm=True):
+        self.deadline = deadline
+        self.alarm = alarm
+        self.requested = False
+        self.forced = False
+        self.expires = None
+        self.busy = 0
+        self.previous = {}
+        self.notes = []
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """Остановка со сроком из переменной `SHUTDOWN_DEADLINE`."""
+        settings = {
+            'deadline': float(os.getenv('SHUTDOWN_DEADLINE', DRAIN_DEADLINE)),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def install(self):
+        """Установка обработчиков сигналов; только в главном потоке."""
+        for signum in SIGNALS:
+            self.previous[signum] = signal.signal(signum, self.handle)
+        self.previous[signal.SIGALRM] = signal.signal(
+            signal.SIGALRM, self.expire
+        )
+
+    def restore(self):
+        """Возврат прежних обработчиков и отмена таймера."""
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        for signum, handler in self.previous.items():
+            signal.signal(signum, handler)
+        self.previous.clear()
+
+    def __enter__(self):
+        """Установка обработчиков на время блока `with`."""
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Возврат прежних обработчиков."""
+        self.restore()
+        self.flush()
+
+    def note(self, level, message, *args):
+        """Отложенная запись в журнал; безопасна в обработчике сигнала."""
+        self.notes.append((level, message, args))
+
+    def flush(self):
+        """Запись отложенного в журнал."""
+        while self.notes:
+            level, message, args = self.notes.pop(0)
+            logger.log(level, message, *args)
+
+    def handle(self, signum, frame):
+        """Обработчик сигнала остановки."""
+        if self.requested:
+            self.note(logging.WARNING,
+                      'Повторный сигнал %s, немедленный выход', signum)
+            self.forced = True
+            raise GracefulExit(1)
+        self.requested = True
+        if not self.busy:
+            self.note(logging.INFO,
+                      'Получен сигнал %s, завершение работы', signum)
+            raise GracefulExit(0)
+        self.note(
+            logging.INFO,
+            'Получен сигнал %s, завершение после отправки (до %s с)',
+            signum, self.deadline
+        )
+        self.expires = time.monotonic() + self.deadline
+        if self.alarm:
+            signal.setitimer(signal.ITIMER_REAL, self.deadline)
+
+    def take_deadline(self):
+        """Отмена таймера срока; секунды, оставшиеся до срока.
+
+        Вызывающий сам укладывается в срок и выходит без SIGALRM, который
+        прервал бы его в произвольном месте.
+        """
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        if self.expires is None:
+            return self.deadline
+        return max(0.0, self.expires - time.monotonic())
+
+    def expire(self, signum, frame):
+        """Срок завершения критической секции истёк."""
+        self.note(logging.ERROR,
+                  'Не удалось завершить отправку за %s с', self.deadline)
+        self.forced = True
+        raise GracefulExit(1)
+
+    @contextmanager
+    def critical(self):
+        """Секция, которую сигнал остановки не прерывает.
+
+        Если сигнал пришёл во время секции, по её выходе поднимается
+        `GracefulExit`, даже когда тело завершилось исключением: иначе
+        обработчик ошибок продолжил бы работу после запроса остановки.
+        Уже поднятый `GracefulExit` (срок истёк, повторный сигнал) не
+        подменяется, даже если до секции он дошёл другим исключением,
+        например отменой задачи `asyncio`.
+        """
+        self.busy += 1
+        exiting = False
+        try:
+            yield
+        except GracefulExit:
+            exiting = True
+            raise
+        finally:
+            self.busy -= 1
+            if (
+                self.requested and not self.busy
+                and not exiting and not self.forced
+            ):
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                self.flush()
+                raise GracefulExit(0)
@@ -0,0 +1,76 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FILE = 'homework.log'
+MAX_BYTES = 50000000
+BACKUP_COUNT = 5
+QUEUE_SIZE = 10000
+SAMPLE_EVERY = 100
+SAMPLED_MESSAGES = frozenset({'Нет обновлений'})
+
+FORMAT = (
+    '%(asctime)s [%(levelname)s] | '
+    '(%(filename)s).%(funcName)s:%(lineno)d | %(message)s'
+)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Передаёт записи в очередь без форматирования в потоке вызова.
+
+    Очередь ограничена: при переполнении записи отбрасываются и
+    подсчитываются в `dropped`, а не блокируют цикл опроса.
+    """
+
+    dropped = 0
+
+    def prepare(self, record):
+        """Запись передаётся как есть: очередь живёт внутри процесса."""
+        return record
+
+    def enqueue(self, record):
+        """Неблокирующая постановка записи в очередь."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает лишь каждую `every`-ю из повторяющихся записей."""
+
+    def __init__(self, messages=SAMPLED_MESSAGES, every=SAMPLE_EVERY):
+        super().__init__()
+        self.messages = messages
+        self.every = every
+        self.counters = dict.fromkeys(messages, 0)
+
+    def filter(self, record):
+        """Решение о пропуске записи."""
+        if record.msg not in self.messages:
+            return True
+        seen = self.counters[record.msg]
+        self.counters[record.msg] = seen + 1
+        return seen % self.every == 0
+
+
+def setup_logging(logger, path=LOG_FILE, level=logging.DEBUG):
+    """Подключение к логгеру очереди и фонового обработчика записи в файл.
+
+    Форматирование, запись в файл и ротация выполняются в потоке
+    `QueueListener`, который останавливается при завершении процесса.
+    """
+    handler = RotatingFileHandler(
+        path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT
+    )
+    handler.setFormatter(logging.Formatter(FORMAT))
+    records = queue.Queue(QUEUE_SIZE)
+    queue_handler = DeferredQueueHandler(records)
+    queue_handler.addFilter(SamplingFilter())
+    logger.setLevel(level)
+    logger.addHandler(queue_handler)
+    listener = QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,238 @@
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+import tracing
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Metric:
+    """Метрика с необязательными метками в формате Prometheus."""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def samples(self):
+        """Пары (имя с метками, значение) для экспорта."""
+        with self.lock:
+            items = list(self.values.items())
+        return [
+            (self.name + _labels(self.labels, key), value)
+            for key, value in items
+        ]
+
+    def render(self):
+        """Метрика в текстовом формате Prometheus."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        lines.extend(f'{name} {value}' for name, value in self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        """Увеличить счётчик."""
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Текущее значение; может вычисляться при каждом опросе метрик."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self.function = None
+
+    def set(self, value, *labels):
+        """Установить значение."""
+        with self.lock:
+            self.values[labels] = value
+
+    def set_function(self, function):
+        """Вычислять значение функцией без аргументов при экспорте."""
+        self.function = function
+
+    def samples(self):
+        """Пары (имя с метками, значение) для экспорта."""
+        if self.function is not None:
+            return [(self.name, self.function())]
+        return super().samples()
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными границами корзин."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, value, *labels):
+        """Учесть наблюдение."""
+        with self.lock:
+            series = self.values.get(labels)
+            if series is None:
+                # Корзины, затем число наблюдений и их сумма.
+                series = [0] * (len(self.buckets) + 1) + [0.0]
+                self.values[labels] = series
+            if value <= self.buckets[-1]:
+                series[bisect_left(self.buckets, value)] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def samples(self):
+        """Корзины нарастающим итогом, сумма и число наблюдений."""
+        with self.lock:
+            items = [
+                (key, list(series)) for key, series in self.values.items()
+            ]
+        result = []
+        bucket = self.name + '_bucket'
+        bucket_labels = self.labels + ('le',)
+        for key, series in items:
+            total = 0
+            for bound, count in zip(self.buckets, series):
+                total += count
+                result.append(
+                    (bucket + _labels(bucket_labels, key + (bound,)), total)
+                )
+            result.append(
+                (bucket + _labels(bucket_labels, key + ('+Inf',)), series[-2])
+            )
+            result.append((self.name + '_count' + _labels(self.labels, key),
+                           series[-2]))
+            result.append((self.name + '_sum' + _labels(self.labels, key),
+                           series[-1]))
+        return result
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        """Добавить метрику и вернуть её."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        return '\n'.join(metric.render() for metric in self.metrics) + '\n'
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'homework_stage_seconds', 'Длительность этапов цикла опроса.', ('stage',)
+))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    'homework_stage_errors_total', 'Исключения на этапах цикла опроса.',
+    ('stage',)
+))
+API_RESPONSES = REGISTRY.register(Counter(
+    'homework_api_responses_total', 'Ответы API по кодам HTTP.', ('code',)
+))
+LOOP_LAG = REGISTRY.register(Gauge(
+    'homework_loop_lag_seconds', 'Отставание тика цикла событий.'
+))
+POLLS_IN_FLIGHT = REGISTRY.register(Gauge(
+    'homework_polls_in_flight', 'Опросы, выполняющиеся сейчас.'
+))
+OUTBOX_DEPTH = REGISTRY.register(Gauge(
+    'homework_outbox_depth', 'Сообщения в очереди на отправку.'
+))
+
+
+def timed(stage):
+    """Декоратор: длительность и ошибки этапа `stage`.
+
+    При включённой трассировке этап попадает и в `tracing.TRACER`.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                STAGE_ERRORS.inc(stage)
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                STAGE_SECONDS.observe(elapsed, stage)
+                if tracing.TRACER is not None:
+                    tracing.TRACER.record(stage, started, elapsed)
+        return wrapper
+    return decorator
+
+
+@functools.lru_cache(maxsize=None)
+def metrics_handler():
+    """Класс обработчика; `http.server` импортируется при первом запуске."""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """Отдача метрик по адресу `/metrics`."""
+
+        def do_GET(self):
+            """Ответ на запрос метрик."""
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = self.server.registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            """Запросы метрик не пишутся в журнал."""
+
+    return MetricsHandler
+
+
+def start_metrics_server(port, host='', registry=REGISTRY):
+    """Запуск HTTP-сервера метрик в фоновом потоке."""
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), metrics_handler())
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    ).start()
+    return server
+
+
+def serve_from_env(offset=0):
+    """Сервер метрик на порту `METRICS_PORT` + `offset`, если порт задан."""
+    port = os.getenv('METRICS_PORT')
+    return start_metrics_server(int(port) + offset) if port else None
@@ -0,0 +1,295 @@
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+GLOBAL_RATE = 30
+CHAT_RATE = 1
+GROUP_RATE = 20 / 60
+MERGE_WINDOW = 2.0
+RETRY_DELAY = 5
+IDLE_WAIT = 1.0
+MESSAGE_LIMIT = 4096
+BATCH = 100
+STOP_TIMEOUT = 5.0
+OUTBOX_FILE = 'homework_outbox.db'
+
+logger = logging.getLogger('homework.outbox')
+
+
+class TokenBucket:
+    """Ведро токенов: `rate` токенов в секунду, не больше `capacity`."""
+
+    def __init__(self, rate, capacity=1, now=0.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def delay(self, now):
+        """Сколько секунд ждать до появления токена."""
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def consume(self, now):
+        """Забрать один токен."""
+        self._refill(now)
+        self.tokens -= 1
+
+
+def chat_rate(chat_id):
+    """Лимит Telegram для чата: группы (отрицательный id) — 20 в минуту."""
+    return GROUP_RATE if str(chat_id).startswith('-') else CHAT_RATE
+
+
+class Outbox:
+    """Очередь исходящих сообщений с ограничением частоты и склейкой.
+
+    Сообщения хранятся в SQLite и удаляются только после успешной
+    отправки (доставка «хотя бы один раз»). Сообщения одному чату,
+    пришедшие в пределах `window` секунд, отправляются одним текстом.
+    У каждой строки есть срок `due`: конец окна склейки, а после отказа
+    Telegram или исчерпания лимита чата — время повторной попытки. Проход
+    доставки читает по индексу только чаты с наступившим сроком.
+    Без пути `path` очередь хранится в памяти и теряется при перезапуске.
+    """
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS outbox ('
+        'id INTEGER PRIMARY KEY, chat_id TEXT NOT NULL, '
+        'text TEXT NOT NULL, created REAL NOT NULL, due REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS outbox_due ON outbox (due)',
+        'CREATE INDEX IF NOT EXISTS outbox_chat ON outbox (chat_id, id)',
+    )
+
+    def __init__(self, path=None, window=MERGE_WINDOW, clock=time.time,
+                 rate=GLOBAL_RATE):
+        self.window = window
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.connection = sqlite3.connect(
+            path or ':memory:', check_same_thread=False
+        )
+        if path:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+        with self.connection:
+            self._migrate()
+            for statement in self.SCHEMA:
+                self.connection.execute(statement)
+        self.global_bucket = TokenBucket(rate, rate, clock())
+        self.buckets = {}
+
+    def _migrate(self):
+        """Колонка `due` для очереди, созданной прежней версией."""
+        columns = {
+            row[1] for row in self.connection.execute(
+                'PRAGMA table_info(outbox)'
+            )
+        }
+        if columns and 'due' not in columns:
+            self.connection.execute(
+                'ALTER TABLE outbox ADD COLUMN due REAL NOT NULL DEFAULT 0'
+            )
+
+    def put(self, chat_id, text):
+        """Поставить сообщение в очередь."""
+        now = self.clock()
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT INTO outbox (chat_id, text, created, due) '
+                'VALUES (?, ?, ?, ?)',
+                (str(chat_id), text, now, now + self.window)
+            )
+        self.wakeup.set()
+
+    def send_message(self, chat_id, text, **kwargs):
+        """Очередь вместо бота: `send_message` ставит сообщение в очередь."""
+        self.put(chat_id, text)
+
+    def __len__(self):
+        """Число сообщений в очереди."""
+        with self.lock:
+            return self.connection.execute(
+                'SELECT COUNT(*) FROM outbox'
+            ).fetchone()[0]
+
+    def absorb(self, other):
+        """Перенос всех сообщений из очереди `other`; число перенесённых.
+
+        Сообщения сначала записываются сюда и лишь затем удаляются из
+        `other`: сбой между шагами даёт повтор, но не потерю.
+        """
+        with other.lock:
+            rows = other.connection.execute(
+                'SELECT id, chat_id, text, created, due FROM outbox '
+                'ORDER BY id'
+            ).fetchall()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'INSERT INTO outbox (chat_id, text, created, due) '
+                'VALUES (?, ?, ?, ?)', [row[1:] for row in rows]
+            )
+        other._delete([row[0] for row in rows])
+        self.wakeup.set()
+        return len(rows)
+
+    def _due(self, now):
+        """Чаты с наступившим сроком, не больше `BATCH` за проход."""
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT chat_id FROM outbox WHERE due <= ? '
+                'GROUP BY chat_id ORDER BY MIN(due) LIMIT ?', (now, BATCH)
+            ).fetchall()
+        return [chat_id for chat_id, in rows]
+
+    def _rows(self, chat_id):
+        """Первые сообщения чата в порядке поступления."""
+        with self.lock:
+            return self.connection.execute(
+                'SELECT id, text FROM outbox WHERE chat_id = ? '
+                'ORDER BY id LIMIT ?', (chat_id, BATCH)
+            ).fetchall()
+
+    def _postpone(self, chat_id, until):
+        """Перенос срока сообщений чата."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                'UPDATE outbox SET due = ? WHERE chat_id = ? AND due < ?',
+                (until, chat_id, until)
+            )
+
+    def _next(self, now):
+        """Пауза до ближайшего срока; `None` — очередь пуста."""
+        with self.lock:
+            due, = self.connection.execute(
+                'SELECT MIN(due) FROM outbox'
+            ).fetchone()
+        return None if due is None else max(0.0, due - now)
+
+    def _delete(self, ids):
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'DELETE FROM outbox WHERE id = ?', [(id_,) for id_ in ids]
+            )
+
+    @staticmethod
+    def _merge(rows):
+        """Склейка сообщений в один текст в пределах лимита Telegram."""
+        ids, texts, size = [], [], -1
+        for id_, text in rows:
+            if texts and size + len(text) + 1 > MESSAGE_LIMIT:
+                break
+            ids.append(id_)
+            texts.append(text)
+            size += len(text) + 1
+        return ids, '\n'.join(texts)
+
+    def _bucket(self, chat_id, now):
+        bucket = self.buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.buckets[chat_id] = TokenBucket(
+                chat_rate(chat_id), now=now
+            )
+        return bucket
+
+    def _send(self, bot, chat_id, now):
+        """Отправка склеенного сообщения с учётом ошибок Telegram."""
+        import telegram
+
+        ids, text = self._merge(self._rows(chat_id))
+        self._bucket(chat_id, now).consume(now)
+        self.global_bucket.consume(now)
+        try:
+            bot.send_message(chat_id, text)
+        except telegram.error.RetryAfter as error:
+            logger.warning('Лимит Telegram для чата %s: ждём %s с',
+                           chat_id, error.retry_after)
+            self._postpone(chat_id, now + error.retry_after)
+        except (telegram.error.BadRequest, telegram.error.Unauthorized) as e:
+            logger.error('Сообщение в чат %s отброшено: %s', chat_id, e)
+            self._delete(ids)
+        except (telegram.error.TelegramError, OSError) as error:
+            logger.error('Ошибка отправки в чат %s: %s', chat_id, error)
+            self._postpone(chat_id, now + RETRY_DELAY)
+        else:
+            self._delete(ids)
+
+    def deliver(self, bot):
+        """Один проход по очереди; возвращает паузу до следующего прохода.
+
+        `None` — очередь пуста.
+        """
+        now = self.clock()
+        for chat_id in self._due(now):
+            wait = self.global_bucket.delay(now)
+            if wait > 0:
+                return wait
+            wait = self._bucket(chat_id, now).delay(now)
+            if wait > 0:
+                self._postpone(chat_id, now + wait)
+                continue
+            self._send(bot, chat_id, now)
+        return self._next(now)
+
+    def serve(self, bot):
+        """Цикл доставки до вызова `stop()`.
+
+        Сбой прохода (например, занятая база или ошибка сокета вне
+        `TelegramError`) не останавливает доставку: проход повторяется
+        через `RETRY_DELAY` секунд, сообщения остаются в очереди.
+        """
+        while not self.stopped.is_set():
+            self.wakeup.clear()
+            try:
+                wait = self.deliver(bot)
+            except Exception as error:
+                logger.exception('Сбой доставки сообщений: %s', error)
+                self.stopped.wait(RETRY_DELAY)
+                continue
+            if wait is None or wait > IDLE_WAIT:
+                wait = IDLE_WAIT
+            self.wakeup.wait(wait)
+
+    def start(self, bot):
+        """Запуск доставки в фоновом потоке."""
+        thread = threading.Thread(
+            target=self.serve, args=(bot,), name='outbox', daemon=True
+        )
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Остановка цикла доставки."""
+        self.stopped.set()
+        self.wakeup.set()
+
+    def close(self):
+        """Закрытие соединения с базой."""
+        self.connection.close()
+
+
+@contextmanager
+def delivering(path, bot):
+    """Отправитель для `send_message`: очередь `path` с фоновой доставкой.
+
+    Без пути сообщения уходят напрямую через `bot`. По выходе из блока
+    доставка останавливается, недоставленное остаётся в файле очереди.
+    """
+    if not path:
+        yield bot
+        return
+    outbox = Outbox(path)
+    thread = outbox.start(bot)
+    try:
+        yield outbox
+    finally:
+        outbox.stop()
+        thread.join(STOP_TIMEOUT)
@@ -0,0 +1,125 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+INTERVAL = 0.01
+PERIOD = 60
+DIRECTORY = 'profiles'
+
+logger = logging.getLogger('homework.profiler')
+
+
+def frame_stack(frame):
+    """Стек кадра в свёрнутом виде: `файл:функция` от корня через `;`."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """Статистический профилировщик по стекам всех потоков процесса.
+
+    Фоновый поток раз в `interval` секунд снимает `sys._current_frames()`
+    и раз в `period` секунд пишет накопленные стеки в `directory` в
+    свёрнутом формате flame graph (`стек число`). Сам процесс при этом
+    не останавливается и не перезапускается.
+    """
+
+    def __init__(self, directory=DIRECTORY, interval=INTERVAL, period=PERIOD,
+                 clock=time.monotonic):
+        self.directory = directory
+        self.interval = interval
+        self.period = period
+        self.clock = clock
+        self.stacks = Counter()
+        self.thread = None
+        self.stopped = threading.Event()
+
+    @property
+    def running(self):
+        """Идёт ли сбор стеков."""
+        return self.thread is not None and self.thread.is_alive()
+
+    def sample(self):
+        """Снимок стеков всех потоков, кроме потока профилировщика."""
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident != own:
+                self.stacks[frame_stack(frame)] += 1
+
+    def flush(self):
+        """Запись накопленных стеков в новый файл; путь или `None`."""
+        if not self.stacks:
+            return None
+        stacks, self.stacks = self.stacks, Counter()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, time.strftime(
+            f'profile-%Y%m%d-%H%M%S-{os.getpid()}.folded'
+        ))
+        with open(path, 'a') as file:
+            for stack, count in stacks.most_common():
+                file.write(f'{stack} {count}\n')
+        logger.info('Профиль записан в %s', path)
+        return path
+
+    def _run(self):
+        logger.info('Профилировщик запущен')
+        flushed = self.clock()
+        while not self.stopped.wait(self.interval):
+            self.sample()
+            if self.clock() - flushed >= self.period:
+                self.flush()
+                flushed = self.clock()
+        self.flush()
+        logger.info('Профилировщик остановлен')
+
+    def start(self):
+        """Запуск сбора в фоновом потоке.
+
+        Журнал и файлы пишет только поток сбора: `start` вызывается и из
+        обработчика сигнала, где запись в журнал может заблокировать
+        процесс.
+        """
+        if self.running:
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(
+            target=self._run, name='profiler', daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Остановка сбора; остаток профиля пишется на диск."""
+        self.stopped.set()
+
+    def toggle(self, signum=None, frame=None):
+        """Включение или выключение сбора; годится как обработчик сигнала."""
+        if self.running and not self.stopped.is_set():
+            self.stop()
+        else:
+            self.start()
+
+
+def setup_from_env():
+    """Профилировщик: SIGUSR1 включает и выключает его без перезапуска.
+
+    С переменной `PROFILE_DIR` сбор идёт с момента запуска процесса.
+    """
+    import signal
+
+    directory = os.getenv('PROFILE_DIR')
+    profiler = SamplingProfiler(
+        directory or DIRECTORY,
+        float(os.getenv('PROFILE_INTERVAL', INTERVAL)),
+        float(os.getenv('PROFILE_PERIOD', PERIOD)),
+    )
+    signal.signal(signal.SIGUSR1, profiler.toggle)
+    if directory:
+        profiler.start()
+    return profiler
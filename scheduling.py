@@ -0,0 +1,169 @@
+import os
+import random
+
+from exceptions import (
+    CircuitOpenError, EndpointConnectionError, StatusCodeError
+)
+
+REVIEWING_PERIOD = 120
+IDLE_PERIOD = 1800
+IDLE_AFTER = 6
+MAX_BACKOFF = 3600
+JITTER = 0.1
+BACKOFF_ERRORS = (StatusCodeError, EndpointConnectionError, CircuitOpenError)
+
+
+class PollPolicy:
+    """Настройки выбора паузы до следующего опроса.
+
+    `period` — обычная пауза; `reviewing` — пауза, пока какая-то работа
+    на проверке; `idle` — пауза после `idle_after` опросов без изменений;
+    при ошибках API пауза растёт вдвое до `max_backoff`. Итоговая пауза
+    случайно сдвигается на ±`jitter` своей длины.
+    """
+
+    def __init__(self, period, reviewing=REVIEWING_PERIOD, idle=IDLE_PERIOD,
+                 idle_after=IDLE_AFTER, max_backoff=MAX_BACKOFF,
+                 jitter=JITTER):
+        self.period = period
+        self.reviewing = reviewing
+        self.idle = idle
+        self.idle_after = idle_after
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+
+    @classmethod
+    def from_env(cls, period, **overrides):
+        """Политика из переменных окружения `POLL_*`."""
+        settings = {
+            'reviewing': float(os.getenv(
+                'POLL_REVIEWING_PERIOD', REVIEWING_PERIOD
+            )),
+            'idle': float(os.getenv('POLL_IDLE_PERIOD', IDLE_PERIOD)),
+            'idle_after': int(os.getenv('POLL_IDLE_AFTER', IDLE_AFTER)),
+            'max_backoff': float(os.getenv('POLL_MAX_BACKOFF', MAX_BACKOFF)),
+            'jitter': float(os.getenv('POLL_JITTER', JITTER)),
+        }
+        settings.update(overrides)
+        return cls(period, **settings)
+
+
+class PollSchedule:
+    """Выбор паузы до следующего опроса одного арендатора."""
+
+    __slots__ = ('policy', 'rand', 'quiet', 'failures', 'reviewing')
+
+    def __init__(self, policy, rand=random.random):
+        self.policy = policy
+        self.rand = rand
+        self.quiet = 0
+        self.failures = 0
+        self.reviewing = False
+
+    def succeeded(self, changed, reviewing):
+        """Учёт успешного опроса."""
+        self.failures = 0
+        self.quiet = 0 if changed else self.quiet + 1
+        self.reviewing = reviewing
+
+    def failed(self, error):
+        """Учёт неудачного опроса; отступ — только при сбоях API."""
+        if isinstance(error, BACKOFF_ERRORS):
+            self.failures += 1
+
+    def delay(self):
+        """Пауза до следующего опроса в секундах."""
+        policy = self.policy
+        if self.failures:
+            delay = min(
+                policy.period * 2 ** (self.failures - 1), policy.max_backoff
+            )
+        elif self.reviewing:
+            delay = policy.reviewing
+        elif self.quiet >= policy.idle_after:
+            delay = policy.idle
+        else:
+            delay = policy.period
+        if policy.jitter:
+            delay *= 1 + policy.jitter * (2 * self.rand() - 1)
+        return delay
+
+
+class TimingWheel:
+    """Иерархическое колесо таймеров для сроков опроса арендаторов.
+
+    `levels` уровней по `slots` ячеек: ячейка уровня `k` покрывает
+    `slots ** k` тиков. Добавление и отмена — O(1), `advance` — O(1) на
+    тик плюс перенос ячейки старшего уровня при переходе её границы.
+    Сроки дальше горизонта колеса переносятся, пока не станут досягаемы.
+    """
+
+    def __init__(self, tick=1.0, slots=64, levels=4, now=0.0):
+        if slots & (slots - 1):
+            raise ValueError('Число ячеек должно быть степенью двойки')
+        self.tick = tick
+        self.bits = slots.bit_length() - 1
+        self.mask = slots - 1
+        self.horizon = 1 << (self.bits * levels)
+        self.current = int(now // tick)
+        self.wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.timers = {}
+
+    def __len__(self):
+        """Число запланированных таймеров."""
+        return len(self.timers)
+
+    def __contains__(self, key):
+        """Запланирован ли таймер с ключом `key`."""
+        return key in self.timers
+
+    def _place(self, key, deadline):
+        delta = min(deadline - self.current, self.horizon - 1)
+        shift = self.bits * (max(delta.bit_length() - 1, 0) // self.bits)
+        slot = self.wheels[shift // self.bits][
+            (self.current + delta) >> shift & self.mask
+        ]
+        slot[key] = deadline
+        self.timers[key] = slot
+
+    def schedule(self, key, delay):
+        """Запланировать `key` через `delay` секунд (не раньше след. тика)."""
+        self.cancel(key)
+        ticks = max(1, -int(-delay // self.tick))
+        self._place(key, self.current + ticks)
+
+    def cancel(self, key):
+        """Отменить таймер; отсутствующий ключ игнорируется."""
+        slot = self.timers.pop(key, None)
+        if slot is not None:
+            del slot[key]
+
+    def _cascade(self, level):
+        slot = self.wheels[level][self.current >> (self.bits * level)
+                                  & self.mask]
+        entries = list(slot.items())
+        slot.clear()
+        for key, deadline in entries:
+            self._place(key, deadline)
+
+    def advance(self, now):
+        """Продвинуть колесо до момента `now`; ключи с наступившим сроком."""
+        due = []
+        target = int(now // self.tick)
+        while self.current < target:
+            self.current += 1
+            for level in range(len(self.wheels) - 1, 0, -1):
+                if not self.current & ((1 << (self.bits * level)) - 1):
+                    self._cascade(level)
+            slot = self.wheels[0][self.current & self.mask]
+            if not slot:
+                continue
+            entries = list(slot.items())
+            slot.clear()
+            for key, deadline in entries:
+                if deadline > self.current:
+                    self._place(key, deadline)
+                else:
+                    del self.timers[key]
+                    due.append(key)
+        return due
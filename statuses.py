@@ -0,0 +1,48 @@
+import enum
+import sys
+
+
+class HomeworkStatus(enum.IntEnum):
+    """Статус проверки работы; `code` — ключ `HOMEWORK_VERDICTS`.
+
+    Члены перечисления — единственные на процесс объекты: в индексе
+    статусов хранится ссылка, а не строка из каждого ответа API. В
+    строках и f-строках член выглядит как код статуса.
+    """
+
+    REVIEWING = 1
+    APPROVED = 2
+    REJECTED = 3
+
+    @property
+    def code(self):
+        """Статус в том виде, в каком его возвращает API."""
+        return self.name.lower()
+
+    def __str__(self):
+        """Код статуса."""
+        return self.code
+
+    def __format__(self, spec):
+        """Код статуса в f-строках."""
+        return format(self.code, spec)
+
+
+BY_CODE = {status.code: status for status in HomeworkStatus}
+
+
+def intern_status(value):
+    """Член `HomeworkStatus` для известного кода.
+
+    Неизвестный статус остаётся строкой, но интернированной: одинаковые
+    значения из разных ответов делят один объект.
+    """
+    status = BY_CODE.get(value)
+    if status is not None:
+        return status
+    return sys.intern(value) if type(value) is str else value
+
+
+def status_code(status):
+    """Строковый код статуса для сообщений и хранилища."""
+    return status.code if isinstance(status, HomeworkStatus) else status
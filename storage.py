@@ -0,0 +1,113 @@
+import hashlib
+import sqlite3
+import threading
+
+from statuses import intern_status, status_code
+
+
+STATE_FILE = 'homework_state.db'
+
+
+def tenant_key(token):
+    """Ключ арендатора в хранилище: токен в открытом виде не сохраняется."""
+    return hashlib.sha256(str(token).encode()).hexdigest()[:16]
+
+
+class StateStore:
+    """Хранилище курсора `from_date` и последних статусов работ."""
+
+    def load(self, tenant):
+        """Курсор (или `None`) и индекс статусов арендатора."""
+        raise NotImplementedError
+
+    def save(self, tenant, cursor, updates):
+        """Атомарное сохранение курсора и изменившихся статусов."""
+        raise NotImplementedError
+
+    def close(self):
+        """Освобождение ресурсов хранилища."""
+
+
+class MemoryStateStore(StateStore):
+    """Хранилище в памяти процесса: состояние теряется при перезапуске."""
+
+    def __init__(self):
+        self.cursors = {}
+        self.indexes = {}
+
+    def load(self, tenant):
+        """Курсор (или `None`) и индекс статусов арендатора."""
+        return self.cursors.get(tenant), dict(self.indexes.get(tenant, {}))
+
+    def save(self, tenant, cursor, updates):
+        """Атомарное сохранение курсора и изменившихся статусов."""
+        self.cursors[tenant] = cursor
+        self.indexes.setdefault(tenant, {}).update(updates)
+
+
+class SQLiteStateStore(StateStore):
+    """Хранилище в файле SQLite в режиме WAL."""
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS cursors ('
+        'tenant TEXT PRIMARY KEY, cursor INTEGER NOT NULL)',
+        # Без типа колонки SQLite сохраняет и числовые id, и имена работ.
+        'CREATE TABLE IF NOT EXISTS homeworks ('
+        'tenant TEXT NOT NULL, homework NOT NULL, status TEXT, '
+        'date_updated TEXT, PRIMARY KEY (tenant, homework))',
+    )
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            for statement in self.SCHEMA:
+                self.connection.execute(statement)
+
+    def load(self, tenant):
+        """Курсор (или `None`) и индекс статусов арендатора."""
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT cursor FROM cursors WHERE tenant = ?', (tenant,)
+            ).fetchone()
+            rows = self.connection.execute(
+                'SELECT homework, status, date_updated FROM homeworks '
+                'WHERE tenant = ?', (tenant,)
+            ).fetchall()
+        index = {
+            homework: (intern_status(status), date)
+            for homework, status, date in rows
+        }
+        return row and row[0], index
+
+    def save(self, tenant, cursor, updates):
+        """Атомарное сохранение курсора и изменившихся статусов."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO cursors VALUES (?, ?)',
+                (tenant, cursor)
+            )
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO homeworks VALUES (?, ?, ?, ?)',
+                [
+                    (tenant, homework, status_code(status), date)
+                    for homework, (status, date) in updates.items()
+                ]
+            )
+
+    def close(self):
+        """Закрытие соединения с базой."""
+        self.connection.close()
+
+
+def open_state_store(path=STATE_FILE):
+    """SQLite-хранилище по пути `path`, по умолчанию — `STATE_FILE`.
+
+    Хранилище в памяти (`path=None`) теряет состояние при перезапуске и
+    нужно только тестам и воспроизведению кассет.
+    """
+    if path:
+        return SQLiteStateStore(path)
+    return MemoryStateStore()
@@ -0,0 +1,186 @@
+import codecs
+import functools
+import json
+from collections import namedtuple
+
+from statuses import intern_status
+
+CHUNK_SIZE = 64 * 1024
+
+HomeworkRecord = namedtuple(
+    'HomeworkRecord', ('key', 'name', 'status', 'date_updated')
+)
+ParsedResponse = namedtuple('ParsedResponse', ('records', 'current_date'))
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+@functools.lru_cache(maxsize=None)
+def json_loads():
+    """Функция разбора JSON: `orjson`, если установлен, иначе `json`.
+
+    `orjson` импортируется при первом разборе, а не при импорте модуля.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+def loads(content):
+    """Разбор JSON самым быстрым из доступных модулей."""
+    return json_loads()(content)
+
+
+def to_record(homework):
+    """Компактная запись о работе: ключ (`id` или имя), имя, статус, дата.
+
+    Статус — член `statuses.HomeworkStatus` или интернированная строка.
+    """
+    if not isinstance(homework, dict):
+        raise TypeError('Работа в ответе API — не словарь')
+    name = homework.get('homework_name')
+    return HomeworkRecord(
+        homework.get('id', name), name, intern_status(homework.get('status')),
+        homework.get('date_updated')
+    )
+
+
+def extract(data):
+    """Проверка ответа и извлечение записей за один проход.
+
+    Ошибки те же, что у `check_response`.
+    """
+    if not isinstance(data, dict):
+        raise TypeError('API возвращает не словарь')
+    if 'homeworks' not in data:
+        raise KeyError('нет ключа "homeworks"')
+    homeworks = data['homeworks']
+    if not isinstance(homeworks, list):
+        raise TypeError('response["homeworks"] возвращает не список')
+    return ParsedResponse(
+        [to_record(homework) for homework in homeworks],
+        data.get('current_date')
+    )
+
+
+def parse_response(response):
+    """Декодирование тела ответа целиком и извлечение записей.
+
+    Так разбираются ответы обычного опроса: в них только работы,
+    изменившиеся с прошлого курсора, и разбор целиком быстрее потокового.
+    Тело при этом держится в памяти полностью.
+    """
+    return extract(loads(response.content))
+
+
+class HomeworkStream:
+    """Потоковый разбор ответа API по кускам байтов.
+
+    Итерация выдаёт `HomeworkRecord` по одному, в памяти держится лишь
+    текущий кусок и одна работа. `current_date` доступна после
+    полного прохода. Ошибки структуры — те же, что у `check_response`.
+    Нужен для больших ответов вроде истории с `from_date=0` в `backfill`;
+    обычный опрос его не использует.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+        self.current_date = None
+
+    def _fill(self):
+        """Дочитать следующий кусок; `False`, если данных больше нет."""
+        if self.exhausted:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            text = self.decoder.decode(b'', final=True)
+        else:
+            text = self.decoder.decode(chunk)
+        self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+        return True
+
+    def _peek(self):
+        """Следующий значимый символ (без пробелов); '' в конце потока."""
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in _WHITESPACE
+            ):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ''
+
+    def _expect(self, *chars):
+        char = self._peek()
+        if char not in chars or not char:
+            raise ValueError(f'Некорректный JSON: ожидалось {chars}')
+        self.position += 1
+        return char
+
+    def _value(self):
+        """Следующее JSON-значение целиком."""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # Число на границе куска могло прочитаться не полностью.
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.position = end
+            return value
+
+    def _homeworks(self):
+        if self._peek() != '[':
+            raise TypeError('response["homeworks"] возвращает не список')
+        self.position += 1
+        if self._peek() == ']':
+            self.position += 1
+            return
+        while True:
+            yield to_record(self._value())
+            if self._expect(',', ']') == ']':
+                return
+
+    def __iter__(self):
+        """Записи о работах по мере чтения ответа."""
+        if self._peek() != '{':
+            raise TypeError('API возвращает не словарь')
+        self.position += 1
+        found = False
+        if self._peek() == '}':
+            self.position += 1
+        else:
+            while True:
+                key = self._value()
+                self._expect(':')
+                if key == 'homeworks':
+                    found = True
+                    yield from self._homeworks()
+                elif key == 'current_date':
+                    self.current_date = self._value()
+                else:
+                    self._value()
+                if self._expect(',', '}') == '}':
+                    break
+        if not found:
+            raise KeyError('нет ключа "homeworks"')
+
+
+def stream_response(response):
+    """Потоковый разбор ответа, запрошенного с `stream=True`."""
+    return HomeworkStream(response.iter_content(CHUNK_SIZE))
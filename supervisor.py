@@ -0,0 +1,310 @@
+import glob
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from bisect import bisect
+
+import homework
+from exceptions import GracefulExit
+from lifecycle import Shutdown
+from outbox import Outbox
+from storage import tenant_key
+from tenants import TenantRegistry, load_tenants
+
+WORKERS = os.cpu_count() or 1
+REPLICAS = 100
+CHECK_INTERVAL = 1.0
+RESTART_DELAY = 1.0
+MAX_RESTART_DELAY = 60.0
+STOP_TIMEOUT = 10.0
+
+logger = logging.getLogger('homework.supervisor')
+
+
+def ring_hash(value):
+    """Положение строки на кольце: 64 бита BLAKE2b."""
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big'
+    )
+
+
+class HashRing:
+    """Кольцо согласованного хеширования.
+
+    Каждый узел занимает `replicas` точек кольца; ключ принадлежит
+    первому узлу по часовой стрелке. При добавлении или удалении одного
+    из N узлов переезжает около 1/N ключей.
+    """
+
+    def __init__(self, nodes, replicas=REPLICAS):
+        points = sorted(
+            (ring_hash(f'{node}#{replica}'), node)
+            for node in nodes for replica in range(replicas)
+        )
+        self.hashes = [point for point, _ in points]
+        self.nodes = [node for _, node in points]
+
+    def node(self, key):
+        """Узел, которому принадлежит ключ."""
+        index = bisect(self.hashes, ring_hash(key)) % len(self.hashes)
+        return self.nodes[index]
+
+
+def shard_tenants(tenants, workers, replicas=REPLICAS):
+    """Арендаторы по воркерам; все чаты одного токена — в одном воркере."""
+    ring = HashRing(range(workers), replicas)
+    shards = {index: [] for index in range(workers)}
+    for tenant in tenants:
+        shards[ring.node(tenant_key(tenant.token))].append(tenant)
+    return shards
+
+
+def shard_path(path, index):
+    """Отдельный файл воркера рядом с общим путём; без пути — `None`."""
+    return f'{path}.{index}' if path else None
+
+
+def orphan_paths(path, workers):
+    """Файлы очередей воркеров с номерами от `workers` и выше."""
+    orphans = {}
+    for name in glob.glob(f'{glob.escape(path)}.*'):
+        suffix = name[len(path) + 1:]
+        if suffix.isdigit() and int(suffix) >= workers:
+            orphans[int(suffix)] = name
+    return orphans
+
+
+def adopt_orphans(path, workers):
+    """Передача очередей лишних воркеров оставшимся; без пути — ничего.
+
+    Очередь воркера с номером `n` переходит воркеру `n % workers`, файл
+    лишнего воркера удаляется. Вызывается, когда лишние воркеры уже
+    остановлены; оставшиеся могут работать — SQLite разделяет запись
+    между процессами.
+    """
+    if not path:
+        return
+    for index, orphan in sorted(orphan_paths(path, workers).items()):
+        source = Outbox(orphan)
+        target = Outbox(shard_path(path, index % workers))
+        try:
+            moved = target.absorb(source)
+        finally:
+            source.close()
+            target.close()
+        os.remove(orphan)
+        logger.info('Очередь воркера %s (%s сообщений) передана воркеру %s',
+                    index, moved, index % workers)
+
+
+def run_worker(index, tenants, workers):
+    """Процесс-воркер: опрос своей доли арендаторов движком `engine`.
+
+    У воркера свой журнал, своя очередь сообщений и свой порт метрик
+    (`METRICS_PORT` + 1 + номер); общий лимит Telegram делится поровну.
+    С `TENANTS_FILE` воркер сам следит за файлами и берёт из них свою долю.
+    """
+    import engine
+    from metrics import serve_from_env
+    from outbox import GLOBAL_RATE
+
+    homework.init(log_file=f'homework.worker{index}.log')
+    ring = HashRing(range(workers))
+    registry = engine.read_registry(
+        lambda tenant: ring.node(tenant_key(tenant.token)) == index
+    )
+    serve_from_env(offset=index + 1)
+    engine.serve(
+        tenants, shard_path(homework.OUTBOX_DB, index),
+        GLOBAL_RATE / workers, registry
+    )
+
+
+def read_config():
+    """Число воркеров и арендаторы из окружения, `.env` и `TENANTS_FILE`."""
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+    workers = int(os.getenv('WORKERS', WORKERS))
+    path = os.getenv('TENANTS_FILE')
+    if path:
+        return workers, TenantRegistry(path).load()
+    return workers, load_tenants(os.getenv('TENANTS', ''))
+
+
+class Supervisor:
+    """Запуск воркеров, перезапуск упавших и перебалансировка.
+
+    Воркер с кодом выхода 0 считается завершившим работу, с любым другим —
+    упавшим: он перезапускается с паузой, растущей вдвое до
+    `MAX_RESTART_DELAY` и сбрасываемой после такого же срока без падений.
+    Очереди сообщений воркеров лежат рядом с `outbox`; при уменьшении
+    числа воркеров недоставленное из лишних очередей переходит оставшимся.
+    С `watching=True` (реестр `TENANTS_FILE`) запускаются все воркеры,
+    даже с пустой долей: арендатор, добавленный в файл позже, может
+    достаться любому из них.
+    """
+
+    def __init__(self, workers, tenants, target=run_worker, context=None,
+                 restart_delay=RESTART_DELAY, clock=time.monotonic,
+                 outbox=None, watching=False):
+        self.target = target
+        self.outbox = outbox
+        self.watching = watching
+        self.context = context or multiprocessing.get_context('spawn')
+        self.restart_delay = restart_delay
+        self.clock = clock
+        self.processes = {}
+        self.started = {}
+        self.backoff = {}
+        self.restart_at = {}
+        self.finished = set()
+        self.workers = 0
+        self.shards = {}
+        self.reload = False
+        self.configure(workers, tenants)
+
+    def configure(self, workers, tenants):
+        """Новое распределение; перезапускаются только изменённые доли.
+
+        При смене числа воркеров перезапускаются все: каждый воркер
+        фильтрует реестр и делит лимит Telegram по их числу.
+        """
+        shards = shard_tenants(tenants, workers)
+        changed = [
+            index for index in range(max(workers, self.workers))
+            if workers != self.workers
+            or shards.get(index) != self.shards.get(index)
+        ]
+        self._stop(changed)
+        for index in changed:
+            self.finished.discard(index)
+            self.backoff.pop(index, None)
+            self.restart_at.pop(index, None)
+        self.workers, self.shards = workers, shards
+        adopt_orphans(self.outbox, workers)
+        if changed:
+            logger.info('Распределение арендаторов по %s воркерам: %s',
+                        workers, {i: len(s) for i, s in shards.items()})
+        return changed
+
+    def _start(self, index):
+        process = self.context.Process(
+            target=self.target, name=f'worker-{index}',
+            args=(index, self.shards[index], self.workers)
+        )
+        process.start()
+        self.processes[index] = process
+        self.started[index] = self.clock()
+        logger.info('Воркер %s запущен, pid %s', index, process.pid)
+
+    def _stop(self, indexes, timeout=STOP_TIMEOUT):
+        """Остановка воркеров: SIGTERM всем сразу, общий срок ожидания.
+
+        Воркеры завершают отправку параллельно, и остановка занимает
+        не больше `timeout`, сколько бы их ни было; не успевшие
+        завершаются SIGKILL.
+        """
+        processes = [
+            process for process in (
+                self.processes.pop(index, None) for index in indexes
+            ) if process is not None
+        ]
+        for process in processes:
+            process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    def _crashed(self, index, process):
+        """Учёт завершения воркера; `True`, если пора его перезапускать."""
+        if process.exitcode == 0:
+            self.processes.pop(index)
+            self.finished.add(index)
+            return False
+        now = self.clock()
+        if index not in self.restart_at:
+            logger.error('Воркер %s упал с кодом %s', index, process.exitcode)
+            if now - self.started[index] >= MAX_RESTART_DELAY:
+                self.backoff.pop(index, None)
+            delay = self.restart_delay
+            if index in self.backoff:
+                delay = min(self.backoff[index] * 2, MAX_RESTART_DELAY)
+            self.backoff[index] = delay
+            self.restart_at[index] = now + delay
+        return now >= self.restart_at[index]
+
+    def check(self):
+        """Запуск недостающих воркеров и перезапуск упавших."""
+        for index in range(self.workers):
+            if not self._needed(index) or index in self.finished:
+                continue
+            process = self.processes.get(index)
+            if process is not None and process.is_alive():
+                continue
+            if process is not None and not self._crashed(index, process):
+                continue
+            self.restart_at.pop(index, None)
+            self._start(index)
+
+    def _needed(self, index):
+        return self.watching or bool(self.shards[index])
+
+    @property
+    def done(self):
+        """Все нужные воркеры завершили работу."""
+        return all(
+            index in self.finished
+            for index in self.shards if self._needed(index)
+        )
+
+    def stop(self):
+        """Остановка всех воркеров."""
+        self._stop(list(self.processes))
+
+    def request_reload(self, signum=None, frame=None):
+        """Обработчик SIGHUP: перечитать настройки на следующей проверке."""
+        self.reload = True
+
+    def run(self, config=read_config):
+        """Цикл надзора до сигнала остановки или завершения всех воркеров."""
+        signal.signal(signal.SIGHUP, self.request_reload)
+        try:
+            with Shutdown() as shutdown:
+                while not self.done:
+                    with shutdown.critical():
+                        if self.reload:
+                            self.reload = False
+                            self.configure(*config())
+                        self.check()
+                    time.sleep(CHECK_INTERVAL)
+        except GracefulExit:
+            logger.info('Остановка воркеров')
+            raise
+        finally:
+            self.stop()
+
+
+def main():
+    """Запуск `WORKERS` процессов опроса для арендаторов из `TENANTS`."""
+    homework.init()
+    workers, tenants = read_config()
+    watching = bool(os.getenv('TENANTS_FILE'))
+    if not homework.TELEGRAM_TOKEN or not (tenants or watching):
+        logger.critical('Проверьте переменные окружения')
+        sys.exit(1)
+    Supervisor(
+        workers, tenants, outbox=homework.OUTBOX_DB, watching=watching
+    ).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import logging
+import os
+from collections import namedtuple
+
+Tenant = namedtuple('Tenant', ('token', 'chat_id'))
+Subscription = namedtuple('Subscription', ('token', 'chat_ids'))
+
+logger = logging.getLogger('homework.tenants')
+
+
+def load_tenants(spec):
+    """Разбор строки вида `token:chat_id,token:chat_id`."""
+    tenants = []
+    for item in spec.split(','):
+        token, _, chat_id = item.strip().rpartition(':')
+        if token and chat_id:
+            tenants.append(Tenant(token, chat_id))
+    return tenants
+
+
+def parse_tenants(text):
+    """Арендаторы из текста: строки в формате `TENANTS`, `#` — комментарий."""
+    tenants = []
+    for line in text.splitlines():
+        tenants.extend(load_tenants(line.partition('#')[0]))
+    return tenants
+
+
+def check_tenant(tenant):
+    """Проверка арендатора, как `check_tokens`, но без выхода из программы.
+
+    Идентификатор чата — целое число или имя канала `@name`.
+    """
+    chat_id = tenant.chat_id
+    if not tenant.token or not (
+        chat_id.lstrip('-').isdigit() or chat_id.startswith('@')
+    ):
+        logger.error('Некорректный арендатор для чата %s пропущен', chat_id)
+        return False
+    return True
+
+
+def group_tenants(tenants):
+    """Подписки: один токен — набор чатов, без повторов и с порядком."""
+    chats = {}
+    for tenant in tenants:
+        chats.setdefault(tenant.token, {})[tenant.chat_id] = None
+    return [
+        Subscription(token, tuple(chat_ids))
+        for token, chat_ids in chats.items()
+    ]
+
+
+class TenantRegistry:
+    """Арендаторы из файла или каталога файлов с отслеживанием изменений.
+
+    Изменения замечаются по времени изменения и размеру файлов: проверка
+    без изменений стоит одного `stat` на файл. `accept` отбирает
+    арендаторов, например долю воркера.
+    """
+
+    def __init__(self, path, accept=None):
+        self.path = path
+        self.accept = accept
+        self.signature = None
+
+    def files(self):
+        """Файлы настроек: сам путь или файлы каталога без скрытых."""
+        if not os.path.isdir(self.path):
+            return [self.path]
+        return sorted(
+            entry.path for entry in os.scandir(self.path)
+            if entry.is_file() and not entry.name.startswith('.')
+        )
+
+    @staticmethod
+    def _signature(files):
+        signature = []
+        for path in files:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return signature
+
+    def load(self):
+        """Все арендаторы из файлов.
+
+        Отпечаток файлов запоминается только после удачного чтения:
+        файл, который не удалось прочитать, перечитывается на следующей
+        проверке.
+        """
+        files = self.files()
+        signature = self._signature(files)
+        tenants = []
+        for path in files:
+            try:
+                with open(path, encoding='utf-8') as file:
+                    tenants.extend(parse_tenants(file.read()))
+            except FileNotFoundError:
+                continue
+        if self.accept is not None:
+            tenants = [tenant for tenant in tenants if self.accept(tenant)]
+        self.signature = signature
+        return tenants
+
+    def changed(self):
+        """Новый список арендаторов, если файлы изменились, иначе `None`."""
+        if self._signature(self.files()) == self.signature:
+            return None
+        logger.info('Файлы арендаторов изменились, перечитываю')
+        return self.load()
@@ -1,6 +1,8 @@
 import sys
 import os
 
+import pytest
+
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
@@ -21,3 +23,11 @@ if (
 pytest_plugins = [
     'tests.fixtures.fixture_data'
 ]
+
+
+@pytest.fixture(autouse=True)
+def memory_state(monkeypatch):
+    """Состояние бота в тестах хранится в памяти, а не в файле."""
+    import homework
+    monkeypatch.setattr(homework, 'STATE_DB', None)
+    monkeypatch.setattr(homework, 'OUTBOX_DB', None)
@@ -0,0 +1,60 @@
+from alerts import MAX_KINDS, OTHER, ErrorAggregator
+from clock import VirtualClock
+from exceptions import EndpointConnectionError, StatusCodeError
+
+
+def alternating(count):
+    for index in range(count):
+        if index % 2:
+            yield EndpointConnectionError('timeout')
+        else:
+            yield StatusCodeError('Статус сервера: 500')
+
+
+class TestErrorAggregator:
+    def test_digest_instead_of_spam(self):
+        clock = VirtualClock(start=0)
+        errors = ErrorAggregator(window=3600, clock=clock)
+        sent = []
+        for error in alternating(13):
+            sent.append(errors.failed('a', error))
+            clock.sleep(600)
+        messages = [message for message in sent if message]
+        assert len(messages) == 3, (
+            'Первый сбой сообщается сразу, остальные — сводкой раз в окно.'
+        )
+        assert messages[0] == 'Сбой в работе программы: Статус сервера: 500'
+        digest = messages[1]
+        assert 'всего 6' in digest and 'StatusCodeError × 3' in digest, (
+            'Сводка должна содержать число сбоев по типам.'
+        )
+        assert 'EndpointConnectionError × 3' in digest
+
+    def test_recovered_once(self):
+        errors = ErrorAggregator(clock=VirtualClock(start=0))
+        assert errors.recovered('a') is None
+        errors.failed('a', ValueError('boom'))
+        errors.failed('b', ValueError('boom'))
+        errors.failed('a', ValueError('boom'))
+        assert errors.recovered('a').endswith(': 2'), (
+            'После сбоев должно приходить сообщение о восстановлении.'
+        )
+        assert errors.recovered('a') is None, (
+            'Сообщение о восстановлении отправляется один раз.'
+        )
+        assert 'b' in errors.incidents, 'Арендаторы учитываются отдельно.'
+
+    def test_bounded_memory(self):
+        clock = VirtualClock(start=0)
+        errors = ErrorAggregator(window=10 ** 9, clock=clock)
+        for index in range(10000):
+            error = type(f'Error{index % 50}', (Exception,), {})
+            errors.failed('a', error('x' * 1000 + str(index)))
+        groups = errors.incidents['a'].groups
+        assert len(groups) == MAX_KINDS + 1, (
+            'Число групп сбоев должно быть ограничено.'
+        )
+        assert groups[OTHER].count == 10000 - 1 - sum(
+            group.count for kind, group in groups.items() if kind != OTHER
+        )
+        assert all(len(group.sample) <= 200 for group in groups.values())
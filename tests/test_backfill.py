@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from backfill import Backfill, progress_key, to_date
+from storage import MemoryStateStore, tenant_key
+
+DAY = 24 * 60 * 60
+HISTORY = [
+    {'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+     'date_updated': to_date(10 * DAY)},
+    {'id': 2, 'homework_name': 'hw2', 'status': 'rejected',
+     'date_updated': to_date(40 * DAY)},
+    {'id': 3, 'homework_name': 'hw3', 'status': 'reviewing',
+     'date_updated': to_date(400 * DAY)},
+]
+
+
+class HistoryResponse:
+    status_code = 200
+    reason = ''
+
+    def __init__(self, homeworks, fail_at=None):
+        self.body = json.dumps({'homeworks': homeworks, 'current_date': 1})
+        self.fail_at = fail_at
+
+    def iter_content(self, size):
+        body = self.body.encode()
+        for i in range(0, len(body), 5):
+            if self.fail_at is not None and i >= self.fail_at:
+                raise ConnectionError('обрыв')
+            yield body[i:i + 5]
+
+
+class HistoryTransport:
+    """API истории: работы, обновлённые не раньше `from_date`.
+
+    С `fail_after` ответ обрывается после стольких работ.
+    """
+
+    def __init__(self, fail_after=None):
+        self.requests = []
+        self.fail_after = fail_after
+
+    def get(self, url, params, **kwargs):
+        start = params['from_date']
+        self.requests.append(start)
+        homeworks = [
+            homework for homework in HISTORY
+            if homework['date_updated'] >= to_date(start)
+        ]
+        response = HistoryResponse(homeworks)
+        if self.fail_after is not None:
+            response.fail_at = response.body.index(
+                json.dumps(homeworks[self.fail_after])
+            )
+        return response
+
+
+class TestBackfill:
+    def test_history_requested_once(self):
+        store = MemoryStateStore()
+        http = HistoryTransport()
+        messages = []
+        statuses = Backfill('token', store, http, messages.append).run(
+            0, 500 * DAY
+        )
+        assert http.requests == [0], (
+            'История запрашивается одним потоковым запросом.'
+        )
+        assert {str(status): count for status, count in statuses.items()} == {
+            'approved': 1, 'rejected': 1, 'reviewing': 1
+        }
+        assert len(messages) == 3, 'Каждая работа — одно уведомление.'
+        cursor, index = store.load(tenant_key('token'))
+        assert cursor == 500 * DAY, (
+            'Без курсора опрос должен продолжиться с конца загрузки.'
+        )
+        assert set(index) == {1, 2, 3}
+        assert store.load(progress_key(tenant_key('token')))[0] == 500 * DAY
+
+    def test_resume_after_failure(self):
+        store = MemoryStateStore()
+        sent = []
+        with pytest.raises(ConnectionError):
+            Backfill(
+                'token', store, HistoryTransport(fail_after=1), sent.append
+            ).run(0, 500 * DAY)
+        messages = []
+        Backfill('token', store, HistoryTransport(), messages.append).run(
+            0, 500 * DAY
+        )
+        assert len(sent) == 1 and len(messages) == 2, (
+            'Уже загруженные до обрыва работы не должны попадать в '
+            'уведомления.'
+        )
+
+    def test_only_changes_counted(self):
+        store = MemoryStateStore()
+        Backfill('token', store, HistoryTransport()).run(0, 500 * DAY)
+        statuses = Backfill('token', store, HistoryTransport()).run(
+            0, 500 * DAY, restart=True
+        )
+        assert not statuses, (
+            'Итог учитывает только работы с новым статусом.'
+        )
+
+    def test_summary(self):
+        messages = []
+        Backfill(
+            'token', MemoryStateStore(), HistoryTransport(), messages.append,
+            summary=True
+        ).run(0, 500 * DAY)
+        assert messages == [
+            'Загружена история работ: 3 '
+            '(approved: 1, rejected: 1, reviewing: 1)'
+        ], 'В режиме итога отправляется одно сообщение.'
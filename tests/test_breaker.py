@@ -0,0 +1,75 @@
+import pytest
+
+from breaker import CircuitBreaker
+from exceptions import CircuitOpenError, StatusCodeError
+from utils import MockResponseGET
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class MockTransport:
+    def __init__(self, status):
+        self.status = status
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return MockResponseGET(random_timestamp=1, http_status=self.status)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self):
+        clock = Clock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10,
+                                 clock=clock)
+        for _ in range(2):
+            breaker.before_call()
+            breaker.record_failure()
+        assert breaker.state == breaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_half_open_probe(self):
+        clock = Clock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10,
+                                 clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        breaker.before_call()
+        assert breaker.state == breaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == breaker.OPEN, (
+            'Неудачный пробный запрос снова размыкает цепь.'
+        )
+        clock.now = 20
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == breaker.CLOSED
+
+    def test_request_api_fails_fast(self, homework_module):
+        breaker = CircuitBreaker(failure_threshold=2, clock=Clock())
+        transport = MockTransport(500)
+        for _ in range(4):
+            with pytest.raises((StatusCodeError, CircuitOpenError)):
+                homework_module.request_api(
+                    {}, 0, http=transport, breaker=breaker
+                )
+        assert transport.calls == 2, (
+            'При разомкнутой цепи запросы к API не должны отправляться.'
+        )
+
+    def test_client_errors_do_not_trip(self, homework_module):
+        breaker = CircuitBreaker(failure_threshold=1, clock=Clock())
+        with pytest.raises(StatusCodeError):
+            homework_module.request_api(
+                {}, 0, http=MockTransport(401), breaker=breaker
+            )
+        assert breaker.state == breaker.CLOSED
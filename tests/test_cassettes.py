@@ -0,0 +1,115 @@
+import time
+
+import pytest
+import requests
+import telegram
+
+import utils
+from cassettes import Cassette, Replayer, recording, replay
+from clock import VirtualClock
+
+HOMEWORK = {'id': 1, 'homework_name': 'hw1', 'status': 'reviewing'}
+
+
+class Response:
+    reason = ''
+
+    def __init__(self, status, body):
+        self.status_code = status
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class FlakyBot:
+    def __init__(self, **kwargs):
+        self.calls = 0
+
+    def send_message(self, chat_id, text):
+        self.calls += 1
+        if self.calls == 1:
+            raise telegram.error.NetworkError('Network is down')
+
+
+class TestCassettes:
+    def test_compact_round_trip(self, tmp_path):
+        cassette = Cassette(start=100)
+        body = {'homeworks': [HOMEWORK], 'current_date': 1}
+        cassette.add_api(0, 100, 200, body)
+        cassette.add_api(600, 1, 200, dict(body, current_date=2))
+        cassette.add_api(1200, 2, error='timeout')
+        cassette.add_send(600, '1', 'NetworkError', 'down')
+        path = str(tmp_path / 'cassette.jsonl.gz')
+        cassette.save(path)
+        loaded = Cassette.load(path)
+        assert 'hw' not in loaded.events[1], (
+            'Неизменный список работ не должен повторяться в кассете.'
+        )
+        assert loaded.start == 100
+        assert [event['body'] for event in loaded.api_events()] == [
+            body, dict(body, current_date=2), None
+        ]
+        assert list(loaded.send_events()) == [
+            {'k': 'send', 't': 600, 'c': '1', 'e': 'NetworkError',
+             'm': 'down'}
+        ]
+
+    def test_record_and_replay(self, monkeypatch, tmp_path,
+                               homework_module):
+        responses = iter([
+            Response(200, {'homeworks': [HOMEWORK], 'current_date': 10}),
+            Response(500, {'code': 'server_error'}),
+            Response(200, {
+                'homeworks': [dict(HOMEWORK, status='approved')],
+                'current_date': 20,
+            }),
+        ])
+        monkeypatch.setattr(
+            requests, 'get', lambda *args, **kwargs: next(responses)
+        )
+        monkeypatch.setattr(telegram, 'Bot', FlakyBot)
+        for name in ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID'):
+            monkeypatch.setattr(homework_module, name, '1')
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 3:
+                raise utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(time, 'sleep', sleep)
+        path = str(tmp_path / 'cassette.jsonl')
+        with pytest.raises(utils.BreakInfiniteLoop):
+            with recording(path, homework_module):
+                homework_module.main()
+
+        replayer, clock = replay(Cassette.load(path), homework_module)
+        assert replayer.polls == 3 and replayer.diverged == 0, (
+            'Воспроизведение должно повторять запросы записи.'
+        )
+        assert (replayer.sent, replayer.failed) == (4, 1), (
+            'Ошибки Telegram из кассеты должны воспроизводиться.'
+        )
+        assert clock.slept == sum(sleeps), (
+            'Паузы бота должны идти по виртуальным часам.'
+        )
+
+    def test_replay_follows_recorded_time(self):
+        cassette = Cassette(start=100)
+        body = {'homeworks': [], 'current_date': 1}
+        for t in (0, 600, 1200):
+            cassette.add_api(t, None, 200, body)
+        clock = VirtualClock(100)
+        replayer = Replayer(cassette, clock)
+        replayer.get('url')
+        clock.sleep(300)
+        replayer.get('url')
+        assert clock.time() == 700, (
+            'Запрос раньше записанного должен ждать его времени.'
+        )
+        clock.sleep(900)
+        replayer.get('url')
+        assert (replayer.late, replayer.lag) == (1, 300), (
+            'Запрос позже записанного должен учитываться как опоздание.'
+        )
@@ -0,0 +1,246 @@
+import asyncio
+
+import pytest
+
+import engine
+from clock import VirtualClock
+from scheduling import PollPolicy
+from streaming import extract
+from storage import MemoryStateStore, tenant_key
+from tenants import (
+    Subscription, Tenant, TenantRegistry, group_tenants, load_tenants
+)
+
+
+class RecordingBot:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, chat_id, text):
+        self.messages.append((chat_id, text))
+
+
+@pytest.fixture
+def api(monkeypatch, homework_module):
+    responses = {}
+
+    def mock_request_api(headers, timestamp, endpoint=None, http=None,
+                         breaker=None, decode=None, stream=False):
+        token = headers['Authorization'].split()[1]
+        result = responses[token]
+        if isinstance(result, Exception):
+            raise result
+        return result if decode is None else extract(result)
+
+    monkeypatch.setattr(homework_module, 'request_api', mock_request_api)
+    return responses
+
+
+NO_WAIT = PollPolicy(0, reviewing=0, idle=0, jitter=0)
+
+
+class TestPollingEngine:
+    def test_load_tenants(self):
+        assert load_tenants('a:1, b:-100') == [
+            Tenant('a', '1'), Tenant('b', '-100')
+        ], 'Проверьте разбор переменной `TENANTS`.'
+
+    def test_group_tenants(self):
+        assert group_tenants([
+            Tenant('a', '1'), Tenant('b', '3'), Tenant('a', '2'),
+            Tenant('a', '1'),
+        ]) == [Subscription('a', ('1', '2')), Subscription('b', ('3',))]
+
+    def test_each_tenant_notified(self, api):
+        api['a'] = {
+            'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+            'current_date': 1,
+        }
+        api['b'] = {
+            'homeworks': [{'homework_name': 'hw2', 'status': 'rejected'}],
+            'current_date': 1,
+        }
+        bot = RecordingBot()
+        polling = engine.PollingEngine(
+            bot, [Tenant('a', '1'), Tenant('b', '2')],
+            policy=NO_WAIT, tick=0.01
+        )
+        asyncio.run(polling.run(cycles=2))
+        assert sorted(chat for chat, _ in bot.messages) == ['1', '2'], (
+            'Каждый арендатор должен получить одно уведомление.'
+        )
+
+    def test_error_reported_to_tenant(self, api):
+        api['a'] = ValueError('boom')
+        bot = RecordingBot()
+        polling = engine.PollingEngine(
+            bot, [Tenant('a', '1')], policy=NO_WAIT, tick=0.01
+        )
+        asyncio.run(polling.run(cycles=2))
+        assert bot.messages == [('1', 'Сбой в работе программы: boom')], (
+            'Ошибка опроса должна сообщаться арендатору один раз.'
+        )
+
+    def test_one_poll_per_token(self, api, monkeypatch, homework_module):
+        calls = []
+        request_api = homework_module.request_api
+
+        def counting_request_api(*args, **kwargs):
+            calls.append(args[0])
+            return request_api(*args, **kwargs)
+
+        monkeypatch.setattr(
+            homework_module, 'request_api', counting_request_api
+        )
+        api['a'] = {
+            'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+            'current_date': 1,
+        }
+        bot = RecordingBot()
+        polling = engine.PollingEngine(
+            bot, [Tenant('a', '1'), Tenant('a', '2'), Tenant('a', '1')],
+            policy=NO_WAIT, tick=0.01
+        )
+        asyncio.run(polling.run(cycles=1))
+        assert len(calls) == 1, 'Один токен — один запрос к API.'
+        assert sorted(chat for chat, _ in bot.messages) == ['1', '2'], (
+            'Сообщение должно уйти во все чаты подписки по одному разу.'
+        )
+
+    def test_virtual_clock(self, monkeypatch, api, homework_module):
+        calls = []
+        request_api = homework_module.request_api
+
+        def counting_request_api(*args, **kwargs):
+            calls.append(clock.time())
+            return request_api(*args, **kwargs)
+
+        monkeypatch.setattr(
+            homework_module, 'request_api', counting_request_api
+        )
+        api['a'] = {'homeworks': [], 'current_date': 1}
+        clock = VirtualClock(start=0)
+        polling = engine.PollingEngine(
+            RecordingBot(), [Tenant('a', '1')],
+            policy=PollPolicy(600, reviewing=600, idle=600, jitter=0),
+            clock=clock
+        )
+        asyncio.run(polling.run(duration=3600))
+        assert calls == [1, 601, 1201, 1801, 2401, 3001], (
+            'На виртуальных часах опросы должны идти по расписанию '
+            'без реального ожидания.'
+        )
+
+    def test_update_applies_changes(self, homework_module):
+        store = MemoryStateStore()
+        polling = engine.PollingEngine(
+            None, [Tenant('a', '1'), Tenant('b', '2'), Tenant('c', '3')],
+            store=store
+        )
+        rotated = polling.states['b']
+        rotated.tracker.index['hw'] = ('approved', None)
+        changes = polling.update([
+            Tenant('a', '1'), Tenant('a', '4'), Tenant('b2', '2'),
+            Tenant('d', '5'), Tenant('e', 'chat'),
+        ])
+        assert changes == (1, 1, 1), (
+            'Должны добавиться `d`, удалиться `c` и замениться `b` на `b2`; '
+            'некорректный чат пропускается.'
+        )
+        assert list(polling.states) == ['a', 'b2', 'd']
+        assert polling.states['a'].subscription.chat_ids == ('1', '4')
+        assert polling.states['b2'] is rotated, (
+            'При замене токена состояние опроса должно сохраняться.'
+        )
+        assert store.load(tenant_key('b2'))[1] == {'hw': ('approved', None)}
+
+    def test_registry_reload(self, monkeypatch, api, homework_module):
+        class Registry:
+            def __init__(self):
+                self.pending = [[Tenant('a', '1'), Tenant('b', '2')]]
+
+            def changed(self):
+                return self.pending.pop() if self.pending else None
+
+        calls = []
+        request_api = homework_module.request_api
+
+        def counting_request_api(headers, *args, **kwargs):
+            calls.append(headers['Authorization'].split()[1])
+            return request_api(headers, *args, **kwargs)
+
+        monkeypatch.setattr(
+            homework_module, 'request_api', counting_request_api
+        )
+        api['a'] = api['b'] = {'homeworks': [], 'current_date': 1}
+        polling = engine.PollingEngine(
+            RecordingBot(), [Tenant('a', '1')],
+            policy=PollPolicy(600, reviewing=600, idle=600, jitter=0),
+            clock=VirtualClock(start=0), registry=Registry()
+        )
+        asyncio.run(polling.run(duration=60))
+        assert sorted(calls) == ['a', 'b'], (
+            'Новый арендатор из реестра должен опрашиваться без перезапуска.'
+        )
+
+
+class TestTenantRegistry:
+    def test_file(self, tmp_path):
+        path = tmp_path / 'tenants.conf'
+        path.write_text('a:1, b:2  # студенты\n\n# c:3\n')
+        registry = TenantRegistry(str(path))
+        assert registry.load() == [Tenant('a', '1'), Tenant('b', '2')]
+        assert registry.changed() is None, (
+            'Без изменений файлов реестр не должен перечитываться.'
+        )
+        path.write_text('a:1\n')
+        assert registry.changed() == [Tenant('a', '1')]
+
+    def test_directory(self, tmp_path):
+        (tmp_path / 'one').write_text('a:1\n')
+        (tmp_path / '.hidden').write_text('x:0\n')
+        registry = TenantRegistry(
+            str(tmp_path), accept=lambda tenant: tenant.token != 'c'
+        )
+        assert registry.load() == [Tenant('a', '1')]
+        (tmp_path / 'two').write_text('b:2\nc:3\n')
+        assert registry.changed() == [Tenant('a', '1'), Tenant('b', '2')], (
+            'Новые файлы каталога должны подхватываться.'
+        )
+
+    def test_unreadable_file_keeps_polling(self, tmp_path, api,
+                                           homework_module):
+        path = tmp_path / 'tenants.conf'
+        path.write_text('a:1\n')
+        registry = TenantRegistry(str(path))
+        api['a'] = {'homeworks': [], 'current_date': 1}
+        polling = engine.PollingEngine(
+            RecordingBot(), registry.load(),
+            policy=PollPolicy(20, reviewing=20, idle=20, jitter=0),
+            clock=VirtualClock(start=0), registry=registry
+        )
+        path.write_bytes(b'a:1\n\xff\xfe:2\n')
+        asyncio.run(polling.run(duration=60))
+        assert list(polling.states) == ['a'], (
+            'Нечитаемый файл реестра не меняет список арендаторов и не '
+            'останавливает опрос.'
+        )
+        path.write_text('a:1\nb:2\n')
+        assert registry.changed() == [Tenant('a', '1'), Tenant('b', '2')]
+
+    def test_failure_after_fetch_not_recovered(self, api, homework_module):
+        class BrokenStore(MemoryStateStore):
+            def save(self, tenant, cursor, updates):
+                raise OSError('disk full')
+
+        api['a'] = {'homeworks': [], 'current_date': 1}
+        bot = RecordingBot()
+        polling = engine.PollingEngine(
+            bot, [Tenant('a', '1')], policy=NO_WAIT, tick=0.01,
+            store=BrokenStore()
+        )
+        asyncio.run(polling.run(cycles=3))
+        assert bot.messages == [('1', 'Сбой в работе программы: disk full')], (
+            'Сбой после получения ответа не должен сопровождаться '
+            'сообщением о восстановлении.'
+        )
@@ -0,0 +1,123 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import engine
+from clock import VirtualClock
+from leases import Lease, SQLiteLeases, hold_lease
+from scheduling import PollPolicy
+from storage import tenant_key
+from streaming import extract
+from tenants import Tenant
+
+
+class RecordingBot:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, chat_id, text):
+        self.messages.append((chat_id, text))
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock(start=1000)
+
+
+def make_leases(tmp_path, owner, clock):
+    return SQLiteLeases(
+        str(tmp_path / 'leases.db'), owner, ttl=30, clock=clock.time
+    )
+
+
+class TestLeases:
+    def test_single_owner(self, tmp_path, clock):
+        primary = make_leases(tmp_path, 'a', clock)
+        standby = make_leases(tmp_path, 'b', clock)
+        assert primary.acquire(['x', 'y']) == {'x', 'y'}
+        assert standby.acquire(['x', 'y', 'z']) == {'z'}, (
+            'Чужую действующую аренду захватить нельзя.'
+        )
+        clock.sleep(20)
+        assert primary.acquire(['x']) == {'x'}, 'Владелец продлевает аренду.'
+        clock.sleep(20)
+        assert standby.acquire(['x', 'y']) == {'y'}, (
+            'Истёкшая аренда переходит к резервной копии.'
+        )
+        primary.release(['x'])
+        assert standby.acquire(['x']) == {'x'}, (
+            'Возвращённую аренду можно захватить сразу.'
+        )
+
+    def test_wait_for_release(self, tmp_path, clock):
+        primary = make_leases(tmp_path, 'a', clock)
+        primary.acquire(['x'])
+        lease = Lease(make_leases(tmp_path, 'b', clock), 'x',
+                      sleep=clock.sleep)
+        lease.wait()
+        assert 30 <= clock.slept <= 40, (
+            'Резервная копия получает аренду после её истечения.'
+        )
+
+    def test_without_path(self, monkeypatch):
+        monkeypatch.delenv('LEASE_DB', raising=False)
+        with hold_lease('x') as lease:
+            assert lease is None
+
+
+class TestEngineLeases:
+    def test_polls_only_owned(self, tmp_path, clock, monkeypatch,
+                              homework_module):
+        polled = []
+
+        def request_api(headers, *args, **kwargs):
+            polled.append(headers['Authorization'].split()[1])
+            return extract({'homeworks': [], 'current_date': 1})
+
+        monkeypatch.setattr(homework_module, 'request_api', request_api)
+        other = make_leases(tmp_path, 'other', clock)
+        other.acquire([tenant_key('b')])
+        polling = engine.PollingEngine(
+            RecordingBot(), [Tenant('a', '1'), Tenant('b', '2')],
+            policy=PollPolicy(600, reviewing=600, idle=600, jitter=0),
+            clock=clock, leases=make_leases(tmp_path, 'me', clock)
+        )
+        asyncio.run(polling.run(duration=120))
+        assert polled == ['a', 'b'], (
+            'Чужого арендатора копия опрашивает только после истечения '
+            'его аренды.'
+        )
+        assert other.acquire([tenant_key('a')]) == {tenant_key('a')}, (
+            'По завершении работы аренды возвращаются.'
+        )
+
+    def test_survives_lease_errors(self, tmp_path, clock, monkeypatch,
+                                   homework_module):
+        polled = []
+
+        def request_api(headers, *args, **kwargs):
+            polled.append(headers['Authorization'].split()[1])
+            return extract({'homeworks': [], 'current_date': 1})
+
+        class BrokenLeases(SQLiteLeases):
+            calls = 0
+
+            def acquire(self, keys):
+                self.calls += 1
+                if self.calls == 2:
+                    raise sqlite3.OperationalError('database is locked')
+                return super().acquire(keys)
+
+        monkeypatch.setattr(homework_module, 'request_api', request_api)
+        leases = BrokenLeases(str(tmp_path / 'leases.db'), owner='me',
+                              ttl=30, clock=clock.time)
+        polling = engine.PollingEngine(
+            RecordingBot(), [Tenant('a', '1')],
+            policy=PollPolicy(20, reviewing=20, idle=20, jitter=0),
+            clock=clock, leases=leases
+        )
+        asyncio.run(polling.run(duration=60))
+        assert leases.calls > 2 and polled.count('a') >= 3, (
+            'Ошибка базы аренд не останавливает опрос.'
+        )
@@ -0,0 +1,198 @@
+import logging
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = '''
+import sys
+import time
+
+import telegram
+
+import homework
+from utils import MockTelegramBot
+
+responses = iter([{
+    'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+    'current_date': 1,
+}])
+
+
+def send_message(bot, message):
+    print('sending', flush=True)
+    time.sleep(float(sys.argv[1]))
+    print('sent', flush=True)
+
+
+homework.send_message = send_message
+homework.get_api_answer = lambda timestamp: next(
+    responses, {'homeworks': []}
+)
+telegram.Bot = MockTelegramBot
+print('ready', flush=True)
+homework.main()
+'''
+
+
+def start_worker(tmp_path, send_seconds, deadline=5):
+    env = dict(
+        os.environ, PRACTICUM_TOKEN='p', TELEGRAM_TOKEN='t',
+        TELEGRAM_CHAT_ID='1', SHUTDOWN_DEADLINE=str(deadline),
+        PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, 'tests')]),
+    )
+    env.pop('STATE_DB', None)
+    process = subprocess.Popen(
+        [sys.executable, '-c', textwrap.dedent(WORKER), str(send_seconds)],
+        cwd=tmp_path, env=env, stdout=subprocess.PIPE, text=True
+    )
+    assert process.stdout.readline() == 'ready\n'
+    return process
+
+
+def stop(process):
+    started = time.monotonic()
+    process.send_signal(signal.SIGTERM)
+    code = process.wait(timeout=15)
+    return code, time.monotonic() - started
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='нужны сигналы POSIX')
+class TestShutdown:
+    def test_idle_worker_stops_fast(self, tmp_path):
+        process = start_worker(tmp_path, send_seconds=0)
+        assert process.stdout.readline() == 'sending\n'
+        assert process.stdout.readline() == 'sent\n'
+        time.sleep(0.2)
+        code, elapsed = stop(process)
+        assert code == 0, 'Остановка по SIGTERM должна быть штатной.'
+        assert elapsed < 1, (
+            f'Бот в ожидании должен останавливаться быстрее секунды, '
+            f'а не досыпать паузу: {elapsed:.2f} с.'
+        )
+
+    def test_send_is_drained(self, tmp_path):
+        process = start_worker(tmp_path, send_seconds=0.5)
+        assert process.stdout.readline() == 'sending\n'
+        code, elapsed = stop(process)
+        assert process.stdout.read() == 'sent\n', (
+            'Начатая отправка сообщения должна завершиться до выхода.'
+        )
+        assert code == 0
+        assert elapsed < 1.5
+
+    def test_drain_deadline(self, tmp_path):
+        process = start_worker(tmp_path, send_seconds=30, deadline=0.3)
+        assert process.stdout.readline() == 'sending\n'
+        code, elapsed = stop(process)
+        assert code == 1, 'Выход по истечении срока — с ошибкой.'
+        assert elapsed < 1.5, 'Зависшая отправка не должна держать процесс.'
+
+
+ENGINE = '''
+import sys
+import time
+
+import telegram
+
+import engine
+import homework
+from streaming import extract
+from tenants import Tenant
+from utils import MockTelegramBot
+
+
+def request_api(*args, **kwargs):
+    print('polled', flush=True)
+    time.sleep(float(sys.argv[1]))
+    return extract({'homeworks': [], 'current_date': 1})
+
+
+homework.request_api = request_api
+telegram.Bot = MockTelegramBot
+homework.init()
+engine.serve([Tenant('p', '1')], 'outbox.db')
+'''
+
+
+def start_engine(tmp_path, request_seconds, deadline=5):
+    env = dict(
+        os.environ, TELEGRAM_TOKEN='t', LEASE_DB='leases.db',
+        STATE_DB='state.db', SHUTDOWN_DEADLINE=str(deadline),
+        PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, 'tests')]),
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-c', textwrap.dedent(ENGINE), str(request_seconds)],
+        cwd=tmp_path, env=env, stdout=subprocess.PIPE, text=True
+    )
+    assert process.stdout.readline() == 'polled\n'
+    return process
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='нужны сигналы POSIX')
+class TestEngineShutdown:
+    def test_leases_released(self, tmp_path):
+        process = start_engine(tmp_path, request_seconds=0)
+        code, _ = stop(process)
+        assert code == 0, 'Движок останавливается по SIGTERM штатно.'
+        with sqlite3.connect(tmp_path / 'leases.db') as connection:
+            leases = connection.execute('SELECT * FROM leases').fetchall()
+        assert leases == [], 'При остановке аренды возвращаются.'
+
+    def test_request_drained(self, tmp_path):
+        process = start_engine(tmp_path, request_seconds=0.5)
+        code, elapsed = stop(process)
+        assert code == 0, 'Запрос, успевший за срок, дожидается.'
+        assert elapsed < 2.5
+
+    def test_slow_request_deadline(self, tmp_path):
+        process = start_engine(tmp_path, request_seconds=30, deadline=0.5)
+        code, elapsed = stop(process)
+        assert code == 1, 'Выход по истечении срока — с ошибкой.'
+        assert elapsed < 2.5, (
+            f'Зависший запрос к API не должен держать остановку дольше '
+            f'срока: {elapsed:.2f} с.'
+        )
+        with sqlite3.connect(tmp_path / 'leases.db') as connection:
+            leases = connection.execute('SELECT * FROM leases').fetchall()
+        assert leases == [], 'Аренды возвращаются и при выходе по сроку.'
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='нужны сигналы POSIX')
+class TestCriticalSection:
+    def test_exit_after_failed_section(self):
+        from exceptions import GracefulExit
+        from lifecycle import Shutdown
+
+        with Shutdown() as shutdown:
+            with pytest.raises(GracefulExit) as exit_info:
+                with shutdown.critical():
+                    shutdown.handle(signal.SIGTERM, None)
+                    raise RuntimeError('сбой отправки')
+        assert exit_info.value.code == 0, (
+            'Сигнал внутри секции завершает процесс, даже если секция '
+            'закончилась ошибкой.'
+        )
+        assert isinstance(exit_info.value.__context__, RuntimeError)
+
+    def test_handler_defers_logging(self, caplog):
+        from exceptions import GracefulExit
+        from lifecycle import Shutdown
+
+        caplog.set_level(logging.INFO, logger='homework.lifecycle')
+        with Shutdown() as shutdown:
+            with pytest.raises(GracefulExit):
+                with shutdown.critical():
+                    shutdown.handle(signal.SIGTERM, None)
+                    assert not caplog.records, (
+                        'Обработчик сигнала не пишет в журнал: повторный '
+                        'вход в очередь журнала блокирует процесс.'
+                    )
+        assert 'завершение после отправки' in caplog.text
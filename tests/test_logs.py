@@ -0,0 +1,44 @@
+import logging
+import queue
+
+from logs import DeferredQueueHandler, SamplingFilter, setup_logging
+
+
+def make_record(msg, *args):
+    return logging.LogRecord('homework', logging.DEBUG, __file__, 1, msg,
+                             args, None)
+
+
+class TestLogs:
+    def test_sampling_filter(self):
+        sampler = SamplingFilter({'Нет обновлений'}, every=10)
+        passed = [
+            sampler.filter(make_record('Нет обновлений')) for _ in range(30)
+        ]
+        assert passed.count(True) == 3, (
+            'Повторяющиеся записи должны прореживаться.'
+        )
+        assert sampler.filter(make_record('Другое сообщение'))
+
+    def test_formatting_deferred(self):
+        records = queue.Queue()
+        DeferredQueueHandler(records).handle(make_record('Код - %s', 500))
+        record = records.get_nowait()
+        assert record.args == (500,) and not hasattr(record, 'message'), (
+            'Форматирование должно выполняться в фоновом потоке.'
+        )
+
+    def test_full_queue_drops(self):
+        handler = DeferredQueueHandler(queue.Queue(1))
+        handler.handle(make_record('a'))
+        handler.handle(make_record('b'))
+        assert handler.dropped == 1
+
+    def test_listener_writes_file(self, tmp_path):
+        logger = logging.getLogger('homework.test_logs')
+        logger.propagate = False
+        path = tmp_path / 'test.log'
+        listener = setup_logging(logger, path=str(path))
+        logger.info('Код - %s', 500)
+        listener.queue.join()
+        assert 'Код - 500' in path.read_text(encoding='utf-8')
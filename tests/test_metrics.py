@@ -0,0 +1,51 @@
+import urllib.request
+
+import pytest
+
+from metrics import (
+    Counter, Gauge, Histogram, Registry, start_metrics_server, timed,
+    STAGE_ERRORS, STAGE_SECONDS
+)
+
+
+class TestMetrics:
+    def test_histogram_render(self):
+        histogram = Histogram('t_seconds', 'Тест.', ('stage',),
+                              buckets=(0.1, 1))
+        histogram.observe(0.05, 'a')
+        histogram.observe(0.5, 'a')
+        histogram.observe(5, 'a')
+        text = histogram.render()
+        assert 't_seconds_bucket{stage="a",le="0.1"} 1' in text
+        assert 't_seconds_bucket{stage="a",le="1"} 2' in text
+        assert 't_seconds_bucket{stage="a",le="+Inf"} 3' in text
+        assert 't_seconds_count{stage="a"} 3' in text
+        assert '# TYPE t_seconds histogram' in text
+
+    def test_timed_counts_errors(self):
+        @timed('test_stage')
+        def failing():
+            raise ValueError
+
+        with pytest.raises(ValueError):
+            failing()
+        assert STAGE_ERRORS.values[('test_stage',)] >= 1
+        assert STAGE_SECONDS.values[('test_stage',)][-2] >= 1
+
+    def test_homework_stages_instrumented(self, homework_module):
+        homework_module.check_response({'homeworks': []})
+        assert ('check_response',) in STAGE_SECONDS.values, (
+            'Этапы цикла опроса должны замеряться.'
+        )
+
+    def test_server(self):
+        registry = Registry()
+        registry.register(Counter('t_total', 'Тест.')).inc()
+        registry.register(Gauge('t_depth', 'Тест.')).set_function(lambda: 7)
+        server = start_metrics_server(0, host='127.0.0.1', registry=registry)
+        url = f'http://127.0.0.1:{server.server_port}/metrics'
+        try:
+            text = urllib.request.urlopen(url).read().decode()
+        finally:
+            server.shutdown()
+        assert 't_total 1' in text and 't_depth 7' in text
@@ -0,0 +1,159 @@
+import sqlite3
+import time
+
+import telegram
+
+import outbox as outbox_module
+from outbox import RETRY_DELAY, Outbox, TokenBucket, delivering
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingBot:
+    def __init__(self):
+        self.messages = []
+        self.errors = []
+
+    def send_message(self, chat_id, text):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.messages.append((chat_id, text))
+
+
+class TestOutbox:
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=2, capacity=2, now=0)
+        bucket.consume(0)
+        bucket.consume(0)
+        assert bucket.delay(0) == 0.5
+        assert bucket.delay(0.5) == 0
+
+    def test_messages_merged_within_window(self):
+        clock = Clock()
+        outbox = Outbox(window=2, clock=clock)
+        bot = RecordingBot()
+        outbox.put(1, 'first')
+        clock.now += 1
+        outbox.put(1, 'second')
+        assert outbox.deliver(bot) == 1
+        assert bot.messages == [], 'До конца окна сообщения копятся.'
+        clock.now += 1
+        outbox.deliver(bot)
+        assert bot.messages == [('1', 'first\nsecond')], (
+            'Сообщения одному чату в пределах окна склеиваются.'
+        )
+        assert len(outbox) == 0
+
+    def test_chat_rate_limit(self):
+        clock = Clock()
+        outbox = Outbox(window=0, clock=clock)
+        bot = RecordingBot()
+        outbox.put(1, 'a')
+        outbox.deliver(bot)
+        outbox.put(1, 'b')
+        assert outbox.deliver(bot) == 1
+        assert len(bot.messages) == 1, 'Не чаще одного сообщения в секунду.'
+        clock.now += 1
+        outbox.deliver(bot)
+        assert len(bot.messages) == 2
+
+    def test_retry_after_kept_in_queue(self, tmp_path):
+        clock = Clock()
+        path = str(tmp_path / 'outbox.sqlite3')
+        outbox = Outbox(path, window=0, clock=clock)
+        bot = RecordingBot()
+        bot.errors.append(telegram.error.RetryAfter(30))
+        outbox.put(1, 'a')
+        assert outbox.deliver(bot) == 30, 'Нужно выждать `retry_after`.'
+        assert len(Outbox(path)) == 1, (
+            'Неотправленное сообщение должно сохраниться на диске.'
+        )
+        clock.now += 30
+        outbox.deliver(bot)
+        assert bot.messages == [('1', 'a')]
+
+    def test_only_due_chats_read(self):
+        clock = Clock()
+        outbox = Outbox(window=0, clock=clock)
+        bot = RecordingBot()
+        bot.errors.append(telegram.error.RetryAfter(30))
+        outbox.put(1, 'a')
+        outbox.deliver(bot)
+        outbox.put(2, 'b')
+        assert outbox._due(clock.now) == ['2'], (
+            'Проход доставки не должен читать чаты, чей срок не наступил.'
+        )
+        plan = ' '.join(str(row) for row in outbox.connection.execute(
+            'EXPLAIN QUERY PLAN SELECT chat_id FROM outbox WHERE due <= 0'
+        ))
+        assert 'outbox_due' in plan, 'Срок должен искаться по индексу.'
+
+    def test_old_queue_migrated(self, tmp_path):
+        path = str(tmp_path / 'outbox.sqlite3')
+        with sqlite3.connect(path) as connection:
+            connection.execute(
+                'CREATE TABLE outbox (id INTEGER PRIMARY KEY, chat_id TEXT '
+                'NOT NULL, text TEXT NOT NULL, created REAL NOT NULL)'
+            )
+            connection.execute(
+                "INSERT INTO outbox VALUES (1, '1', 'old', 0)"
+            )
+        bot = RecordingBot()
+        Outbox(path).deliver(bot)
+        assert bot.messages == [('1', 'old')], (
+            'Очередь прежней версии должна доставляться.'
+        )
+
+    def test_delivering(self, tmp_path):
+        bot = RecordingBot()
+        with delivering(None, bot) as sender:
+            assert sender is bot, 'Без пути очередь не нужна.'
+        with delivering(str(tmp_path / 'outbox.sqlite3'), bot) as sender:
+            sender.send_message(1, 'a')
+            assert len(sender) == 1, 'Сообщение должно попасть в очередь.'
+
+    def test_socket_error_retried(self):
+        clock = Clock()
+        outbox = Outbox(window=0, clock=clock)
+        bot = RecordingBot()
+        bot.errors.append(ConnectionResetError('сброс соединения'))
+        outbox.put(1, 'a')
+        outbox.put(2, 'b')
+        outbox.deliver(bot)
+        assert bot.messages == [('2', 'b')], (
+            'Ошибка сокета откладывает только свой чат.'
+        )
+        clock.now += RETRY_DELAY
+        outbox.deliver(bot)
+        assert ('1', 'a') in bot.messages
+
+    def test_delivery_survives_failures(self, monkeypatch):
+        monkeypatch.setattr(outbox_module, 'RETRY_DELAY', 0.01)
+        outbox = Outbox(window=0)
+        deliver = outbox.deliver
+        failures = [sqlite3.OperationalError('database is locked')]
+
+        def flaky(bot):
+            if failures:
+                raise failures.pop()
+            return deliver(bot)
+
+        monkeypatch.setattr(outbox, 'deliver', flaky)
+        bot = RecordingBot()
+        outbox.put(1, 'a')
+        thread = outbox.start(bot)
+        for _ in range(100):
+            if bot.messages:
+                break
+            time.sleep(0.02)
+        outbox.stop()
+        thread.join()
+        assert bot.messages == [('1', 'a')], (
+            'Сбой прохода не должен останавливать поток доставки.'
+        )
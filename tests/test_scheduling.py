@@ -0,0 +1,75 @@
+from exceptions import StatusCodeError
+from scheduling import PollPolicy, PollSchedule, TimingWheel
+
+
+def make_schedule(**settings):
+    settings.setdefault('jitter', 0)
+    return PollSchedule(PollPolicy(600, reviewing=60, idle=1800,
+                                   idle_after=3, max_backoff=3000,
+                                   **settings))
+
+
+class TestPollSchedule:
+    def test_reviewing_polls_faster(self):
+        schedule = make_schedule()
+        schedule.succeeded(changed=True, reviewing=True)
+        assert schedule.delay() == 60
+
+    def test_idle_slows_down(self):
+        schedule = make_schedule()
+        delays = []
+        for _ in range(4):
+            schedule.succeeded(changed=False, reviewing=False)
+            delays.append(schedule.delay())
+        assert delays == [600, 600, 1800, 1800], (
+            'После нескольких опросов без изменений пауза должна расти.'
+        )
+
+    def test_exponential_backoff(self):
+        schedule = make_schedule()
+        delays = []
+        for _ in range(4):
+            schedule.failed(StatusCodeError('500'))
+            delays.append(schedule.delay())
+        assert delays == [600, 1200, 2400, 3000]
+        schedule.succeeded(changed=False, reviewing=False)
+        assert schedule.delay() == 600, 'Успешный опрос сбрасывает отступ.'
+
+    def test_other_errors_not_backed_off(self):
+        schedule = make_schedule()
+        schedule.failed(TypeError('не словарь'))
+        schedule.failed(TypeError('не словарь'))
+        assert schedule.delay() == 600
+
+    def test_jitter_bounds(self):
+        policy = PollPolicy(600, jitter=0.1)
+        assert PollSchedule(policy, rand=lambda: 0).delay() == 540
+        assert PollSchedule(policy, rand=lambda: 1).delay() == 660
+
+
+class TestTimingWheel:
+    def test_fires_on_deadline_across_levels(self):
+        wheel = TimingWheel(slots=8, levels=3, now=5)
+        delays = {key: delay for key, delay in enumerate(
+            (0, 1, 7, 8, 63, 64, 65, 511, 512, 1500)
+        )}
+        for key, delay in delays.items():
+            wheel.schedule(key, delay)
+        fired = {}
+        for now in range(6, 1600):
+            for key in wheel.advance(now):
+                fired[key] = now
+        assert fired == {
+            key: 5 + max(1, delay) for key, delay in delays.items()
+        }, 'Таймер должен срабатывать ровно в свой тик на любом уровне.'
+        assert not wheel
+
+    def test_cancel_and_reschedule(self):
+        wheel = TimingWheel(now=0)
+        wheel.schedule('a', 10)
+        wheel.schedule('b', 10)
+        wheel.cancel('a')
+        wheel.schedule('b', 20)
+        assert wheel.advance(15) == []
+        assert wheel.advance(20) == ['b']
+        assert 'a' not in wheel and len(wheel) == 0
@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('requests', 'telegram', 'dotenv', 'orjson', 'http.server')
+
+
+def run_python(code, cwd):
+    env = {
+        key: value for key, value in os.environ.items()
+        if key not in ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID')
+    }
+    env['PYTHONPATH'] = ROOT
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=cwd, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+class TestStartup:
+    def test_import_has_no_side_effects(self, tmp_path):
+        (tmp_path / '.env').write_text('PRACTICUM_TOKEN=from-dotenv\n')
+        result = run_python(
+            'import json, sys, homework; print(json.dumps({'
+            '"modules": [m for m in %r if m in sys.modules], '
+            '"token": homework.PRACTICUM_TOKEN, '
+            '"handlers": len(homework.logger.handlers)}))' % (HEAVY,),
+            tmp_path
+        )
+        assert result['modules'] == [], (
+            'Импорт `homework` не должен подгружать тяжёлые зависимости.'
+        )
+        assert result['token'] is None, (
+            'Файл `.env` читается в `init()`, а не при импорте.'
+        )
+        assert result['handlers'] == 0
+        assert sorted(os.listdir(tmp_path)) == ['.env'], (
+            'Импорт `homework` не должен создавать файлы.'
+        )
+
+    def test_entry_points_import_telegram_lazily(self, tmp_path):
+        result = run_python(
+            'import json, sys, backfill, engine, supervisor; '
+            'print(json.dumps("telegram" in sys.modules))', tmp_path
+        )
+        assert result is False, (
+            'Модуль `telegram` подгружается там, где создаётся бот.'
+        )
+
+    def test_init(self, tmp_path):
+        (tmp_path / '.env').write_text(
+            'PRACTICUM_TOKEN=from-dotenv\nBREAKER_FAILURES=2\n'
+        )
+        result = run_python(
+            'import json, homework; homework.init(); print(json.dumps({'
+            '"token": homework.PRACTICUM_TOKEN, '
+            '"headers": homework.HEADERS, '
+            '"failures": homework.BREAKER.failure_threshold}))',
+            tmp_path
+        )
+        assert result == {
+            'token': 'from-dotenv',
+            'headers': {'Authorization': 'OAuth from-dotenv'},
+            'failures': 2,
+        }, '`init()` должна загружать переменные из `.env`.'
+        assert (tmp_path / 'homework.log').exists()
@@ -0,0 +1,48 @@
+from engine import PollingEngine
+from statuses import HomeworkStatus
+from storage import (
+    STATE_FILE, MemoryStateStore, SQLiteStateStore, open_state_store,
+    tenant_key,
+)
+from tenants import Tenant
+
+
+class TestStateStore:
+    def test_sqlite_roundtrip(self, tmp_path):
+        path = tmp_path / 'state.sqlite3'
+        store = SQLiteStateStore(str(path))
+        assert store.load('t') == (None, {})
+        store.save('t', 100, {1: ('reviewing', 'd1'), 'hw': ('approved', None)})
+        store.save('t', 200, {1: ('approved', 'd2')})
+        store.close()
+
+        store = SQLiteStateStore(str(path))
+        approved = HomeworkStatus.APPROVED
+        assert store.load('t') == (
+            200, {1: (approved, 'd2'), 'hw': (approved, None)}
+        ), 'После перезапуска должны восстанавливаться курсор и статусы.'
+        mode = store.connection.execute('PRAGMA journal_mode').fetchone()[0]
+        assert mode == 'wal'
+        store.close()
+
+    def test_without_path_is_memory(self):
+        assert isinstance(open_state_store(None), MemoryStateStore)
+
+    def test_default_is_sqlite(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        store = open_state_store()
+        assert isinstance(store, SQLiteStateStore), (
+            'По умолчанию состояние должно переживать перезапуск.'
+        )
+        store.close()
+        assert (tmp_path / STATE_FILE).exists()
+
+    def test_engine_resumes_from_cursor(self):
+        store = MemoryStateStore()
+        store.save(tenant_key('a'), 12345, {'hw': ('approved', None)})
+        polling = PollingEngine(None, [Tenant('a', '1')], store=store)
+        state = polling.states['a']
+        assert state.timestamp == 12345, (
+            'Опрос должен продолжаться с сохранённого курсора.'
+        )
+        assert state.tracker.index == {'hw': ('approved', None)}
@@ -0,0 +1,110 @@
+import json
+import tracemalloc
+
+import pytest
+
+from statuses import HomeworkStatus
+from streaming import HomeworkRecord, HomeworkStream, extract, loads
+
+RESPONSE = {
+    'homeworks': [
+        {'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+         'date_updated': '2022-01-01T00:00:00Z', 'reviewer_comment': 'Ок'},
+        {'homework_name': 'hw2', 'status': 'reviewing'},
+    ],
+    'current_date': 1581604970,
+}
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def stream(data, size=7):
+    body = json.dumps(data, ensure_ascii=False).encode()
+    return HomeworkStream(chunked(body, size))
+
+
+class TestStreaming:
+    def test_extract(self):
+        parsed = extract(loads(json.dumps(RESPONSE)))
+        assert parsed.records == [
+            HomeworkRecord(
+                1, 'hw1', HomeworkStatus.APPROVED, '2022-01-01T00:00:00Z'
+            ),
+            HomeworkRecord('hw2', 'hw2', HomeworkStatus.REVIEWING, None),
+        ], 'Ключ записи — `id`, а без него — имя работы.'
+        assert parsed.current_date == 1581604970
+
+    @pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 4096])
+    def test_stream_matches_extract(self, size):
+        records = stream(RESPONSE, size)
+        assert list(records) == extract(RESPONSE).records, (
+            'Потоковый разбор должен совпадать с разбором всего тела '
+            'при любой границе кусков.'
+        )
+        assert records.current_date == 1581604970, (
+            '`current_date` должна быть доступна после прохода.'
+        )
+
+    def test_number_split_across_chunks(self):
+        records = HomeworkStream([b'{"current_date": 12', b'34, "homeworks"',
+                                  b': []}'])
+        assert list(records) == []
+        assert records.current_date == 1234, (
+            'Число на границе кусков нельзя обрезать.'
+        )
+
+    @pytest.mark.parametrize('data, error', [
+        ([], TypeError),
+        ({'current_date': 1}, KeyError),
+        ({'homeworks': {}}, TypeError),
+        ({'homeworks': ['hw']}, TypeError),
+    ])
+    def test_errors_match_extract(self, data, error):
+        with pytest.raises(error):
+            extract(data)
+        with pytest.raises(error):
+            list(stream(data))
+
+    def test_constant_memory(self):
+        homework = json.dumps({
+            'id': 1, 'homework_name': 'hw', 'status': 'approved',
+            'reviewer_comment': 'x' * 1000,
+        }).encode()
+
+        def chunks(count):
+            yield b'{"homeworks": ['
+            for index in range(count):
+                yield (b',' if index else b'') + homework
+            yield b'], "current_date": 1}'
+
+        tracemalloc.start()
+        try:
+            total = sum(1 for _ in HomeworkStream(chunks(5000)))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert total == 5000
+        assert peak < 1024 * 1024, (
+            'Потоковый разбор не должен держать в памяти всё тело ответа.'
+        )
+
+
+class TestStatuses:
+    def test_codes_match_verdicts(self, homework_module):
+        assert {status.code for status in HomeworkStatus} == set(
+            homework_module.HOMEWORK_VERDICTS
+        ), 'Статусы перечисления должны совпадать с `HOMEWORK_VERDICTS`.'
+
+    def test_interned(self):
+        first = extract(loads(json.dumps(RESPONSE))).records
+        second = extract(loads(json.dumps(RESPONSE))).records
+        assert first[0].status is second[0].status is HomeworkStatus.APPROVED
+        assert f'{first[0].status}' == 'approved'
+        unknown = extract(loads(json.dumps({'homeworks': [
+            {'homework_name': 'hw', 'status': 'on' + 'hold'}
+        ] * 2}))).records
+        assert unknown[0].status is unknown[1].status == 'onhold', (
+            'Неизвестный статус хранится одной интернированной строкой.'
+        )
@@ -0,0 +1,43 @@
+import pytest
+import telegram
+
+from benchmarks.stubs import start_practicum_stub, start_telegram_stub
+from exceptions import StatusCodeError
+from transport import Transport
+
+
+class TestStubs:
+    def test_practicum_stub(self, homework_module):
+        server, url = start_practicum_stub(homeworks=3)
+        try:
+            with Transport() as http:
+                response = homework_module.request_api(
+                    homework_module.make_headers('t'), 0, url, http
+                )
+        finally:
+            server.shutdown()
+        homework_module.check_response(response)
+        assert len(response['homeworks']) == 3
+
+    def test_practicum_stub_errors(self, homework_module):
+        server, url = start_practicum_stub(errors={500: 1.0})
+        try:
+            with pytest.raises(StatusCodeError):
+                homework_module.request_api({}, 0, url)
+        finally:
+            server.shutdown()
+
+    def test_telegram_stub(self):
+        server, url = start_telegram_stub(errors={429: 0.5}, seed=3)
+        bot = telegram.Bot(token='123:stub', base_url=url)
+        sent = limited = 0
+        try:
+            for _ in range(10):
+                try:
+                    bot.send_message(42, 'Тест')
+                    sent += 1
+                except telegram.error.RetryAfter:
+                    limited += 1
+        finally:
+            server.shutdown()
+        assert sent == server.messages and sent and limited
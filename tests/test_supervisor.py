@@ -0,0 +1,145 @@
+import functools
+import multiprocessing
+import os
+import signal
+import time
+
+import pytest
+
+from outbox import Outbox
+from supervisor import HashRing, Supervisor, shard_tenants
+from tenants import Tenant
+
+TENANTS = [Tenant(f'token{i}', str(i)) for i in range(2000)]
+
+
+def assignment(workers):
+    return {
+        tenant: index
+        for index, shard in shard_tenants(TENANTS, workers).items()
+        for tenant in shard
+    }
+
+
+def flaky_worker(directory, index, tenants, workers):
+    marker = os.path.join(directory, f'started{index}')
+    crashed = os.path.exists(marker)
+    with open(marker, 'a') as file:
+        file.write('.')
+    os._exit(0 if crashed else 1)
+
+
+def slow_worker(directory, index, tenants, workers):
+    def drain(signum, frame):
+        time.sleep(0.5)
+        os._exit(0)
+
+    signal.signal(signal.SIGTERM, drain)
+    open(os.path.join(directory, f'ready{index}'), 'w').close()
+    while True:
+        time.sleep(1)
+
+
+class TestHashRing:
+    def test_balanced(self):
+        sizes = [len(s) for s in shard_tenants(TENANTS, 4).values()]
+        assert min(sizes) > len(TENANTS) / 4 * 0.7, (
+            'Арендаторы должны распределяться по воркерам равномерно.'
+        )
+
+    @pytest.mark.parametrize('before, after', [(4, 5), (5, 4)])
+    def test_minimal_movement(self, before, after):
+        old, new = assignment(before), assignment(after)
+        moved = sum(old[tenant] != new[tenant] for tenant in TENANTS)
+        assert moved / len(TENANTS) < 1.5 / max(before, after), (
+            'При смене числа воркеров переезжает около 1/N арендаторов.'
+        )
+
+    def test_same_token_same_worker(self):
+        tenants = [Tenant('a', '1'), Tenant('a', '2'), Tenant('b', '3')]
+        shards = shard_tenants(tenants, 8)
+        assert any(
+            shard[:2] == tenants[:2] for shard in shards.values()
+        ), 'Все чаты одного токена должны опрашиваться одним воркером.'
+        assert HashRing(range(3)).node('x') == HashRing(range(3)).node('x')
+
+
+class TestSupervisor:
+    def test_restarts_crashed_worker(self, tmp_path):
+        supervisor = Supervisor(
+            1, TENANTS[:1], target=functools.partial(
+                flaky_worker, str(tmp_path)
+            ),
+            context=multiprocessing.get_context('fork'), restart_delay=0
+        )
+        for _ in range(100):
+            supervisor.check()
+            if supervisor.done:
+                break
+            time.sleep(0.02)
+        assert (tmp_path / 'started0').read_text() == '..', (
+            'Упавший воркер должен перезапускаться.'
+        )
+        assert supervisor.done, (
+            'Воркер, завершившийся с кодом 0, не перезапускается.'
+        )
+
+    def test_rebalance_restarts_only_changed(self):
+        supervisor = Supervisor(4, TENANTS, target=None)
+        changed = supervisor.configure(4, TENANTS[:-1])
+        assert len(changed) == 1, (
+            'Перезапускаются только воркеры с изменившейся долей.'
+        )
+
+    def test_orphaned_outbox_adopted(self, tmp_path):
+        path = str(tmp_path / 'outbox.db')
+        supervisor = Supervisor(3, TENANTS, target=None, outbox=path)
+        orphan = Outbox(f'{path}.2')
+        orphan.put('1', 'Статус изменился')
+        orphan.close()
+        supervisor.configure(2, TENANTS)
+        assert not os.path.exists(f'{path}.2'), (
+            'Очередь лишнего воркера удаляется.'
+        )
+        assert len(Outbox(f'{path}.0')) == 1, (
+            'Недоставленные сообщения лишнего воркера переходят оставшемуся.'
+        )
+
+    def test_resize_restarts_all(self):
+        supervisor = Supervisor(4, TENANTS, target=None)
+        changed = supervisor.configure(5, TENANTS)
+        assert changed == list(range(5)), (
+            'При смене числа воркеров перезапускаются все: их фильтр '
+            'реестра зависит от этого числа.'
+        )
+
+    @pytest.mark.parametrize('watching, expected', [(False, 1), (True, 3)])
+    def test_empty_shards_started_with_registry(self, watching, expected):
+        supervisor = Supervisor(
+            3, TENANTS[:1], target=None, watching=watching
+        )
+        started = []
+        supervisor._start = started.append
+        supervisor.check()
+        assert len(started) == expected, (
+            'С реестром воркер с пустой долей тоже запускается: новый '
+            'арендатор из файла может достаться ему.'
+        )
+
+    def test_workers_stopped_in_parallel(self, tmp_path):
+        supervisor = Supervisor(
+            4, TENANTS, target=functools.partial(slow_worker, str(tmp_path)),
+            context=multiprocessing.get_context('fork')
+        )
+        supervisor.check()
+        for _ in range(250):
+            if len(list(tmp_path.iterdir())) == 4:
+                break
+            time.sleep(0.02)
+        started = time.monotonic()
+        supervisor.stop()
+        elapsed = time.monotonic() - started
+        assert elapsed < 1.5, (
+            f'Воркеры останавливаются одновременно, а не по очереди: '
+            f'{elapsed:.2f} с на четыре воркера по 0.5 с.'
+        )
@@ -0,0 +1,98 @@
+import json
+import logging
+import threading
+import time
+
+import pytest
+
+import tracing
+from metrics import timed
+from profiler import SamplingProfiler
+
+
+@pytest.fixture
+def tracer():
+    tracer = tracing.enable()
+    yield tracer
+    tracing.disable()
+
+
+class TestTracing:
+    def test_disabled_span_is_shared_noop(self):
+        assert tracing.TRACER is None
+        assert tracing.span('a') is tracing.span('b') is tracing.NULL_SPAN, (
+            'Без трассировки `span` не должен создавать объектов.'
+        )
+
+    def test_chrome_trace_export(self, tracer, tmp_path):
+        @timed('stage')
+        def stage():
+            with tracing.span('inner', size=1):
+                pass
+
+        with tracing.span('cycle'):
+            stage()
+        path = tmp_path / 'trace.json'
+        tracer.export(str(path))
+        events = {
+            event['name']: event
+            for event in json.loads(path.read_text())['traceEvents']
+        }
+        assert set(events) == {'cycle', 'stage', 'inner'}, (
+            'Этапы из `timed` и интервалы `span` должны попадать в трассу.'
+        )
+        assert events['inner']['args'] == {'size': 1}
+        outer, inner = events['cycle'], events['stage']
+        assert outer['ph'] == 'X'
+        assert outer['ts'] <= inner['ts'] and (
+            inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+        ), 'Вложенный этап должен лежать внутри интервала цикла.'
+
+    def test_signal_export_in_thread(self, tracer, tmp_path):
+        with tracing.span('cycle'):
+            pass
+        path = tmp_path / 'trace.json'
+        tracing.export_later(tracer, str(path)).join()
+        assert json.loads(path.read_text())['traceEvents'], (
+            'Трасса по сигналу пишется в отдельном потоке.'
+        )
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestSamplingProfiler:
+    def test_writes_folded_stacks(self, tmp_path):
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,))
+        worker.start()
+        profiler = SamplingProfiler(str(tmp_path), interval=0.001, period=60)
+        profiler.start()
+        time.sleep(0.2)
+        profiler.stop()
+        profiler.thread.join()
+        stop.set()
+        worker.join()
+        files = list(tmp_path.iterdir())
+        assert len(files) == 1, 'Остаток профиля пишется при остановке.'
+        lines = files[0].read_text().splitlines()
+        assert any(
+            'test_tracing.py:busy_loop' in line for line in lines
+        ), 'В профиле должны быть стеки работающих потоков.'
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+    def test_toggle_logs_from_profiler_thread(self, tmp_path, caplog):
+        caplog.set_level(logging.INFO, logger='homework.profiler')
+        profiler = SamplingProfiler(str(tmp_path), interval=0.001, period=60)
+        profiler.toggle()
+        assert not [
+            record for record in caplog.records
+            if record.threadName != 'profiler'
+        ], 'Обработчик сигнала не пишет в журнал сам.'
+        profiler.toggle()
+        profiler.thread.join()
+        assert {record.threadName for record in caplog.records} == {
+            'profiler'
+        }
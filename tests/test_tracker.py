@@ -0,0 +1,55 @@
+from streaming import to_record
+from tracker import HomeworkTracker
+
+
+class TestHomeworkTracker:
+    def test_only_transitions_reported(self):
+        parsed = []
+
+        def parse(record):
+            parsed.append(record.key)
+            return f'{record.key}:{record.status}'
+
+        tracker = HomeworkTracker(parse)
+        homeworks = [
+            {'id': 1, 'homework_name': 'a', 'status': 'reviewing'},
+            {'id': 2, 'homework_name': 'b', 'status': 'reviewing'},
+        ]
+        assert list(tracker.changes(map(to_record, homeworks))) == [
+            '1:reviewing', '2:reviewing'
+        ], 'Новые работы должны попадать в уведомления.'
+        homeworks[1] = {'id': 2, 'homework_name': 'b', 'status': 'approved'}
+        assert list(tracker.changes(map(to_record, homeworks))) == [
+            '2:approved'
+        ], (
+            'Уведомлять нужно только о работах, у которых сменился статус, '
+            'а не только о первой в списке.'
+        )
+        assert parsed == [1, 2, 2], (
+            'Каждая изменившаяся работа должна разбираться один раз.'
+        )
+
+    def test_failed_parse_skipped(self):
+        parsed = []
+
+        def parse(record):
+            parsed.append(record.key)
+            if record.status == 'weird':
+                raise KeyError('status')
+            return record.key
+
+        tracker = HomeworkTracker(parse)
+        records = [
+            to_record({'homework_name': 'a', 'status': 'weird'}),
+            to_record({'homework_name': 'b', 'status': 'approved'}),
+        ]
+        assert list(tracker.changes(records)) == ['b'], (
+            'Ошибка разбора одной работы не должна прерывать проход.'
+        )
+        assert 'a' in tracker.take_updates(), (
+            'Работа с ошибкой разбора должна сохраняться в индексе.'
+        )
+        assert list(tracker.changes(records)) == []
+        assert parsed == ['a', 'b'], (
+            'Работа с ошибкой разбора не должна разбираться повторно.'
+        )
@@ -0,0 +1,83 @@
+import pytest
+import requests
+
+from benchmarks.stubs import start_practicum_stub
+from exceptions import EndpointConnectionError
+from transport import (
+    NOT_MODIFIED, Transport, accept_encoding, body_digest
+)
+
+
+class TestTransport:
+    def test_default_timeout(self, monkeypatch):
+        transport = Transport(connect_timeout=1, read_timeout=2)
+        calls = []
+
+        def mock_get(url, **kwargs):
+            calls.append(kwargs)
+
+        monkeypatch.setattr(transport.session, 'get', mock_get)
+        transport.get('http://localhost/')
+        assert calls[0]['timeout'] == (1, 2), (
+            'Проверьте, что пул передаёт таймауты подключения и чтения.'
+        )
+
+    def test_adapter_shared_by_schemes(self):
+        with Transport(pool_maxsize=7) as transport:
+            adapter = transport.session.get_adapter('https://example.com/')
+            assert adapter is transport.session.get_adapter('http://x/')
+            assert adapter._pool_maxsize == 7
+
+    def test_request_exception_wrapped(self, homework_module):
+        class FailingTransport:
+            def get(self, url, **kwargs):
+                raise requests.ConnectTimeout('timeout')
+
+        with pytest.raises(EndpointConnectionError):
+            homework_module.request_api({}, 0, http=FailingTransport())
+
+    @pytest.mark.parametrize('etags', (True, False))
+    def test_conditional_not_modified(self, etags, homework_module):
+        server, url = start_practicum_stub(
+            homeworks=2, change_rate=0, compress=True, etags=etags
+        )
+        headers = homework_module.make_headers('t')
+        try:
+            with Transport(conditional=True) as http:
+                first = homework_module.request_api(headers, 0, url, http)
+                retried = homework_module.request_api(headers, 0, url, http)
+                http.commit(headers)
+                second = homework_module.request_api(headers, 0, url, http)
+        finally:
+            server.shutdown()
+        assert len(first['homeworks']) == 2
+        assert retried is not NOT_MODIFIED, (
+            'Пока ответ не обработан, он должен приходить заново.'
+        )
+        assert second is NOT_MODIFIED, (
+            'Неизменившийся ответ не должен разбираться повторно.'
+        )
+
+    def test_digest_ignores_current_date(self):
+        assert body_digest(b'{"homeworks": [], "current_date": 1}') == (
+            body_digest(b'{"homeworks": [], "current_date": 2}')
+        )
+        assert body_digest(b'{"homeworks": [1]}') != (
+            body_digest(b'{"homeworks": [2]}')
+        )
+
+    @pytest.mark.parametrize('supported, expected', [
+        ('gzip,deflate', 'gzip;q=1.0, deflate;q=0.9'),
+        ('gzip,deflate,br,zstd',
+         'zstd;q=1.0, br;q=0.9, gzip;q=0.8, deflate;q=0.7'),
+    ])
+    def test_accept_encoding_follows_urllib3(self, monkeypatch, supported,
+                                             expected):
+        import urllib3.util.request
+
+        monkeypatch.setattr(
+            urllib3.util.request, 'ACCEPT_ENCODING', supported
+        )
+        assert accept_encoding() == expected, (
+            'Предлагаются только кодировки, которые распаковывает urllib3.'
+        )
@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+EVENT_LIMIT = 100000
+
+# Пока трассировка выключена, `span` возвращает один и тот же пустой
+# контекст, а `metrics.timed` лишь сравнивает `TRACER` с `None`.
+TRACER = None
+NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    """Журнал интервалов в формате Chrome trace event.
+
+    Хранит последние `limit` событий; файл из `export` открывается в
+    `chrome://tracing` или Perfetto.
+    """
+
+    def __init__(self, limit=EVENT_LIMIT, clock=time.perf_counter):
+        self.clock = clock
+        self.origin = clock()
+        self.pid = os.getpid()
+        self.events = deque(maxlen=limit)
+
+    def record(self, name, started, duration, args=None):
+        """Учесть интервал `name`, начатый в `started` по часам трассировки."""
+        event = {
+            'name': name,
+            'ph': 'X',
+            'ts': (started - self.origin) * 1e6,
+            'dur': duration * 1e6,
+            'pid': self.pid,
+            'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def export(self, path):
+        """Запись событий в файл атомарной заменой."""
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump({'traceEvents': list(self.events)}, file)
+        os.replace(temporary, path)
+
+
+@contextmanager
+def _span(tracer, name, args):
+    started = tracer.clock()
+    try:
+        yield
+    finally:
+        tracer.record(name, started, tracer.clock() - started, args)
+
+
+def span(name, **args):
+    """Интервал трассировки; без включённой трассировки ничего не делает."""
+    if TRACER is None:
+        return NULL_SPAN
+    return _span(TRACER, name, args)
+
+
+def enable(limit=EVENT_LIMIT):
+    """Включение трассировки; возвращает журнал."""
+    global TRACER
+    TRACER = Tracer(limit)
+    return TRACER
+
+
+def disable():
+    """Выключение трассировки."""
+    global TRACER
+    TRACER = None
+
+
+def export_later(tracer, path):
+    """Запись трассировки в отдельном потоке.
+
+    Обработчик сигнала не пишет файлы сам: он прервал главный поток в
+    произвольном месте, и долгая запись задержала бы его там.
+    """
+    thread = threading.Thread(
+        target=tracer.export, args=(path,), name='trace-export', daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def setup_from_env():
+    """Трассировка в файл `TRACE_FILE`: при выходе и по сигналу SIGUSR2."""
+    import atexit
+    import signal
+
+    path = os.getenv('TRACE_FILE')
+    if not path:
+        return None
+    tracer = enable(int(os.getenv('TRACE_EVENTS', EVENT_LIMIT)))
+    atexit.register(tracer.export, path)
+    signal.signal(
+        signal.SIGUSR2, lambda signum, frame: export_later(tracer, path)
+    )
+    return tracer
@@ -0,0 +1,52 @@
+import logging
+
+from statuses import HomeworkStatus, intern_status
+
+logger = logging.getLogger('homework.tracker')
+
+
+class HomeworkTracker:
+    """Индекс последних известных статусов домашних работ.
+
+    Работы из `streaming.HomeworkRecord` индексируются по ключу записи
+    (`id` или `homework_name`), значение — пара статуса и `date_updated`.
+    """
+
+    __slots__ = ('parse', 'index', 'updates')
+
+    def __init__(self, parse, index=None):
+        self.parse = parse
+        self.index = {} if index is None else index
+        self.updates = {}
+
+    def changes(self, records):
+        """Сообщения о реальных изменениях статуса за один проход по записям.
+
+        Каждая запись разбирается не более одного раза. Ошибка разбора
+        одной записи пишется в журнал и не прерывает проход: статус
+        попадает в индекс, чтобы не разбирать его заново при каждом опросе.
+        """
+        for record in records:
+            seen = (record.status, record.date_updated)
+            if self.index.get(record.key) == seen:
+                continue
+            self.index[record.key] = self.updates[record.key] = seen
+            try:
+                message = self.parse(record)
+            except Exception as error:
+                logger.error('Не удалось разобрать работу %r: %r',
+                             record.name, error)
+                continue
+            yield message
+
+    def in_review(self):
+        """Есть ли среди известных работ взятые на проверку."""
+        return any(
+            intern_status(status) is HomeworkStatus.REVIEWING
+            for status, _ in self.index.values()
+        )
+
+    def take_updates(self):
+        """Изменения индекса с прошлого вызова — для сохранения."""
+        updates, self.updates = self.updates, {}
+        return updates
@@ -0,0 +1,117 @@
+import hashlib
+import re
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+ENCODINGS = ('zstd', 'br', 'gzip', 'deflate')
+
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+# Ответ API меняется при каждом запросе только в поле `current_date`.
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*\d+')
+NOT_MODIFIED = object()
+
+
+def accept_encoding():
+    """Заголовок `Accept-Encoding`: самые компактные из доступных первыми.
+
+    Доступные кодировки — те, что распаковывает установленный `urllib3`,
+    а не те, чьи пакеты просто установлены: иначе сервер может ответить
+    в кодировке, которую клиент вернёт нераспакованной.
+    """
+    from urllib3.util.request import ACCEPT_ENCODING
+
+    supported = {
+        encoding.strip() for encoding in ACCEPT_ENCODING.split(',')
+    }
+    encodings = [
+        encoding for encoding in ENCODINGS if encoding in supported
+    ]
+    return ', '.join(
+        f'{encoding};q={1 - index / 10:.1f}'
+        for index, encoding in enumerate(encodings)
+    )
+
+
+def body_digest(content):
+    """Отпечаток тела ответа без поля `current_date`."""
+    return hashlib.blake2b(
+        CURRENT_DATE.sub(b'', content), digest_size=16
+    ).digest()
+
+
+class Transport:
+    """Пул постоянных keep-alive соединений с API Практикума.
+
+    С `conditional=True` для каждого заголовка `Authorization` хранятся
+    `ETag`, `Last-Modified` и отпечаток тела; ответ 304 или тело с
+    прежним отпечатком помечаются `response.not_modified`. Новые значения
+    ждут `commit`: пока ответ не обработан и состояние не сохранено,
+    следующий запрос сравнивается с прежними и получит тело заново.
+    """
+
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT,
+                 pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE, conditional=False):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = (connect_timeout, read_timeout)
+        self.conditional = conditional
+        self.validators = {}
+        self.pending = {}
+        self.session = requests.Session()
+        self.session.headers['Accept-Encoding'] = accept_encoding()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url, headers=None, **kwargs):
+        """GET-запрос через общий пул соединений."""
+        kwargs.setdefault('timeout', self.timeout)
+        if not self.conditional:
+            return self.session.get(url, headers=headers, **kwargs)
+        headers = dict(headers or {})
+        key = headers.get('Authorization')
+        etag, modified, digest = self.validators.get(key, (None,) * 3)
+        if etag:
+            headers['If-None-Match'] = etag
+        if modified:
+            headers['If-Modified-Since'] = modified
+        response = self.session.get(url, headers=headers, **kwargs)
+        response.not_modified = response.status_code == 304
+        if response.status_code == 200:
+            new_digest = body_digest(response.content)
+            response.not_modified = new_digest == digest
+            self.pending[key] = (
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+                new_digest,
+            )
+        return response
+
+    def commit(self, headers):
+        """Принять значения последнего ответа для заголовков `headers`."""
+        key = (headers or {}).get('Authorization')
+        validators = self.pending.pop(key, None)
+        if validators is not None:
+            self.validators[key] = validators
+
+    def close(self):
+        """Закрытие всех соединений пула."""
+        self.session.close()
+
+    def __enter__(self):
+        """Пул как контекстный менеджер."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Закрытие пула при выходе из контекста."""
+        self.close()